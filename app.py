@@ -2,10 +2,27 @@
 PV Proposal Generator - GUI App
 Homescreen with section buttons. Each section generates a part of the final document.
 """
+import io
 import os
+import re
 import sys
+import math
+import bisect
 import json
+import heapq
+import hashlib
+import itertools
+import contextvars
+import unicodedata
+import time
+import random
 import threading
+from contextlib import contextmanager
+from xml.sax.saxutils import escape as xml_escape
+from email.utils import parsedate_to_datetime
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed, wait, FIRST_COMPLETED
+from concurrent.futures.process import BrokenProcessPool
 import tkinter as tk
 from tkinter import ttk, filedialog, scrolledtext, messagebox
 import fitz  # PyMuPDF
@@ -13,8 +30,11 @@ import anthropic
 from docx import Document
 from docx.shared import Pt, Cm
 from docx.enum.text import WD_ALIGN_PARAGRAPH
+from docx.enum.style import WD_STYLE_TYPE
+from docx.oxml import parse_xml
+from docx.oxml.ns import qn, nsdecls
 
-from config.config import anthropic_api_key
+from config.config import anthropic_api_key, rate_limits, model_routing
 
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
@@ -28,17 +48,806 @@ def _load_prompt(filename):
         return f.read()
 
 
+# ---------------------------------------------------------------------------
+# DISK CACHE
+# ---------------------------------------------------------------------------
+CACHE_DIR = os.path.join(BASE_DIR, 'cache')
+
+
+class DiskCache:
+    """Small on-disk JSON cache: one file per key, LRU eviction.
+
+    Entries are touched on every hit, so eviction (past max_bytes or
+    max_entries) drops the least recently used ones first. Entries older than
+    ttl seconds are treated as missing. Safe to share between threads; writes
+    are atomic (temp file + rename).
+    """
+
+    def __init__(self, directory, max_bytes=None, max_entries=None, ttl=None):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not isinstance(entry, dict) or 'value' not in entry:
+            return None
+        if self.ttl is not None and time.time() - entry.get('created', 0) > self.ttl:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return entry['value']
+
+    def put(self, key, value):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self._path(key)
+        tmp_path = f'{path}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump({'created': time.time(), 'value': value}, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        if self.max_bytes or self.max_entries:
+            self._evict()
+
+    def delete(self, key):
+        try:
+            os.remove(self._path(key))
+        except OSError:
+            pass
+
+    def _evict(self):
+        with self._lock:
+            entries = []
+            for entry in os.scandir(self.directory):
+                if entry.name.endswith('.json'):
+                    try:
+                        st = entry.stat()
+                    except OSError:
+                        continue
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+            total = sum(size for _, size, _ in entries)
+            count = len(entries)
+            for _, size, path in sorted(entries):
+                over_bytes = self.max_bytes and total > self.max_bytes
+                over_count = self.max_entries and count > self.max_entries
+                if not (over_bytes or over_count):
+                    break
+                try:
+                    os.remove(path)
+                except OSError:
+                    continue
+                total -= size
+                count -= 1
+
+
+def _file_sha256(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
 # ---------------------------------------------------------------------------
 # PDF EXTRACTION
 # ---------------------------------------------------------------------------
-def extract_pdf_text(pdf_path):
-    """Extract all text from a PDF using PyMuPDF."""
+PDF_CACHE_MAX_BYTES = 500 * 1024 * 1024
+# Multi-process extraction kicks in from this many pages; each worker
+# extracts PDF_SHARD_PAGES pages at a time
+PDF_PARALLEL_MIN_PAGES = 200
+PDF_SHARD_PAGES = 50
+PDF_MAX_WORKERS = os.cpu_count() or 1
+# Bump when the extraction output changes, to invalidate old entries
+_PDF_CACHE_VERSION = f'1-{fitz.VersionBind}'
+_pdf_cache = DiskCache(os.path.join(CACHE_DIR, 'pdf'), max_bytes=PDF_CACHE_MAX_BYTES)
+
+
+def _pdf_cache_key(pdf_path):
+    """Content hash of the PDF, with an mtime+size fast path that skips re-hashing."""
+    st = os.stat(pdf_path)
+    stat_id = f'{os.path.abspath(pdf_path)}|{st.st_mtime_ns}|{st.st_size}'
+    stat_key = 'stat-' + hashlib.sha1(stat_id.encode('utf-8')).hexdigest()
+
+    cached = _pdf_cache.get(stat_key)
+    if cached:
+        digest = cached['sha256']
+    else:
+        digest = _file_sha256(pdf_path)
+        _pdf_cache.put(stat_key, {'sha256': digest})
+    return f'pages-{digest}-{_PDF_CACHE_VERSION}'
+
+
+def _extract_page_range(pdf_path, start, end):
+    """Extract pages [start, end) - runs in a worker process with its own fitz document."""
     doc = fitz.open(pdf_path)
-    pages = []
-    for i in range(len(doc)):
-        pages.append(doc[i].get_text())
+    try:
+        return [doc[i].get_text() for i in range(start, end)]
+    finally:
+        doc.close()
+
+
+def _iter_extract(pdf_path, parallel=True):
+    """Yield page texts in order.
+
+    Large PDFs (>= PDF_PARALLEL_MIN_PAGES) are sharded into page ranges that
+    worker processes extract concurrently; shards are yielded in order as soon
+    as each one is ready.
+    """
+    doc = fitz.open(pdf_path)
+    page_count = len(doc)
+    workers = min(PDF_MAX_WORKERS, math.ceil(page_count / PDF_SHARD_PAGES))
+
+    if not (parallel and page_count >= PDF_PARALLEL_MIN_PAGES and workers > 1):
+        try:
+            for i in range(page_count):
+                yield doc[i].get_text()
+        finally:
+            doc.close()
+        return
     doc.close()
-    return pages
+
+    ranges = [(start, min(start + PDF_SHARD_PAGES, page_count))
+              for start in range(0, page_count, PDF_SHARD_PAGES)]
+    pool = ProcessPoolExecutor(max_workers=workers)
+    try:
+        futures = [pool.submit(_extract_page_range, pdf_path, start, end) for start, end in ranges]
+        for (start, end), future in zip(ranges, futures):
+            try:
+                shard = future.result()
+            except (OSError, BrokenProcessPool):
+                # No usable process pool (e.g. frozen build) - extract the shard here
+                shard = _extract_page_range(pdf_path, start, end)
+            yield from shard
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_pdf_pages(pdf_path, use_cache=True, parallel=True):
+    """Yield the text of each PDF page as soon as it is extracted.
+
+    Lets generation start on the first pages while the rest of the file is
+    still being parsed. The result is cached once the whole file is read.
+    """
+    if use_cache:
+        key = _pdf_cache_key(pdf_path)
+        cached = _pdf_cache.get(key)
+        if cached is not None:
+            yield from cached['pages']
+            return
+
+    pages = []
+    for text in _iter_extract(pdf_path, parallel=parallel):
+        pages.append(text)
+        yield text
+
+    if use_cache:
+        _pdf_cache.put(key, {'pages': pages})
+
+
+def extract_pdf_text(pdf_path, use_cache=True, parallel=True):
+    """Extract all text from a PDF using PyMuPDF.
+
+    Per-page text is cached on disk, keyed by file content, so re-runs on the
+    same PDF skip extraction entirely. Large PDFs are extracted by several
+    processes, each on its own page range.
+    """
+    return list(iter_pdf_pages(pdf_path, use_cache=use_cache, parallel=parallel))
+
+
+# A line at the top or bottom of at least this share of the pages (and of at
+# least BOILERPLATE_MIN_PAGES of them) is a running header or footer
+BOILERPLATE_MIN_SHARE = 0.5
+BOILERPLATE_MIN_PAGES = 3
+# Pages read before deciding what repeats, when pages arrive one by one
+BOILERPLATE_WINDOW = 12
+# First/last lines of a page where page numbers and running headers live
+_PAGE_EDGE_LINES = 3
+
+_PAGE_NUMBER_RE = re.compile(
+    r'^\W*(?:pag(?:ina)?\.?\s*)?\d{1,4}(?:\s*(?:/|din|of)\s*\d{1,4})?\W*$', re.IGNORECASE)
+# Page counters inside a header or footer line ("Pagina 3 din 40", "3/40")
+_PAGE_COUNTER_RE = re.compile(
+    r'\b(?:pag(?:ina)?\.?\s*\d{1,4}(?:\s*(?:/|din|of)\s*\d{1,4})?|\d{1,4}\s*(?:/|din|of)\s*\d{1,4})\b',
+    re.IGNORECASE)
+# Only soft hyphens are joined: a visible hyphen at a line break is as likely
+# to belong to the text ("dintr-un", "nord-vest") as to be a word split
+_SOFT_HYPHEN_BREAK_RE = re.compile(r'\xad\n')
+_SPACES_RE = re.compile(r'[ \t\xa0]+')
+_BLANK_LINES_RE = re.compile(r'\n{3,}')
+
+
+def _page_lines(page):
+    """(line, key, at_edge) for the lines of a page.
+
+    Keys ignore case, spacing and page counters ("Pagina 3 din 40"), so a
+    footer matches itself on every page; other digits are kept, so
+    "Procedura 3" and "Procedura 4" stay distinct.
+    """
+    lines = [_SPACES_RE.sub(' ', line).strip()
+             for line in _SOFT_HYPHEN_BREAK_RE.sub('', page).replace('\xad', '').split('\n')]
+    non_empty = [i for i, line in enumerate(lines) if line]
+    depth = min(_PAGE_EDGE_LINES, len(non_empty) // 3)
+    edge = set(non_empty[:depth] + non_empty[len(non_empty) - depth:])
+    return [(line, _PAGE_COUNTER_RE.sub('#', line.lower()), i in edge) for i, line in enumerate(lines)]
+
+
+def _is_boilerplate_candidate(line):
+    """Whether an edge line may be a header or footer; headings and labels ("Scop:") never are."""
+    return not _SECTION_RE.match(line) and not line.endswith(':')
+
+
+def iter_normalized_pages(pages, progress_callback=None, window=BOILERPLATE_WINDOW, stats=None):
+    """Yield page texts without running headers, footers, page numbers and layout noise.
+
+    A line is dropped only when it is at the top or bottom of the page and the
+    same line (page counters aside) is at the edge of most pages, or when it
+    is a bare page number; body text is never dropped, even when it repeats
+    (table rows, per-procedure labels). Words split with a soft hyphen are
+    joined and runs of spaces and blank lines are collapsed. The first
+    `window` pages are read before anything is yielded, so repeats are known
+    from the start; after that, pages pass through one by one (pass
+    window=len(pages) to decide on the whole document). stats, if given, is
+    filled with chars_before, chars_after and lines_removed.
+    """
+    stats = stats if stats is not None else {}
+    stats.update(chars_before=0, chars_after=0, lines_removed=0)
+    # Pages each line occurs on at the page edge
+    counts = Counter()
+    seen = 0
+
+    def _clean(lines):
+        kept = []
+        for line, key, at_edge in lines:
+            if line and at_edge and _is_boilerplate_candidate(line):
+                repeated = counts[key] >= BOILERPLATE_MIN_PAGES and counts[key] >= BOILERPLATE_MIN_SHARE * seen
+                if repeated or _PAGE_NUMBER_RE.match(line):
+                    stats['lines_removed'] += 1
+                    continue
+            kept.append(line)
+        text = _BLANK_LINES_RE.sub('\n\n', '\n'.join(kept)).strip()
+        stats['chars_after'] += len(text)
+        return text
+
+    buffered = []
+    for page in pages:
+        seen += 1
+        stats['chars_before'] += len(page)
+        lines = _page_lines(page)
+        counts.update({key for line, key, at_edge in lines if line and at_edge})
+        if buffered is not None:
+            buffered.append(lines)
+            if len(buffered) < window:
+                continue
+            for page_lines in buffered:
+                yield _clean(page_lines)
+            buffered = None
+        else:
+            yield _clean(lines)
+    for page_lines in buffered or ():
+        yield _clean(page_lines)
+
+    if progress_callback and stats['chars_before']:
+        saved = stats['chars_before'] - stats['chars_after']
+        progress_callback(
+            f"  Text normalizat: {stats['chars_before']} -> {stats['chars_after']} caractere "
+            f"(-{round(100 * saved / stats['chars_before'])}%), {stats['lines_removed']} linii repetate eliminate")
+
+
+def normalize_pages(pages, progress_callback=None, stats=None):
+    """iter_normalized_pages() collected into a list.
+
+    Uses the same window as the streamed PTE run, so both see the same page
+    texts and send the same chunks.
+    """
+    return list(iter_normalized_pages(pages, progress_callback, stats=stats))
+
+
+# Numbered heading lines ("3.", "3.2.1 Montajul ...") used for section spans
+# when the PDF has no outline
+_HEADING_LINE_RE = re.compile(r'^\s*(\d+(?:\.\d+){0,3})\.?\s+([A-ZĂÂÎȘŞȚŢ][^\n]{2,120})$')
+
+
+def _spans_from_headings(headings, page_count):
+    """(level, title, first_page) list -> spans with 1-based inclusive page ranges."""
+    spans = []
+    for i, (level, title, first_page) in enumerate(headings):
+        last_page = page_count
+        for next_level, _, next_page in headings[i + 1:]:
+            if next_level <= level:
+                last_page = max(first_page, next_page)
+                break
+        spans.append({'title': title, 'level': level, 'first_page': first_page, 'last_page': last_page})
+    return spans
+
+
+class ExtractedDocument:
+    """One PDF, extracted at most once and only when its text is first needed.
+
+    pages: text of each page, without repeated headers, footers and layout
+           noise (normalize_pages)
+    sections: outline spans ({'title', 'level', 'first_page', 'last_page'},
+              pages 1-based) from the PDF bookmarks, or from numbered
+              headings in the text when there are none
+    metadata: PDF metadata plus page_count and file_size
+    """
+
+    def __init__(self, path, use_cache=True):
+        self.path = path
+        self.use_cache = use_cache
+        self._lock = threading.Lock()
+        self._key = None
+        self._pages = None
+        self._info = None
+        self._sections = None
+        self.normalization = {}
+
+    @property
+    def name(self):
+        return os.path.basename(self.path)
+
+    @property
+    def key(self):
+        """Content-based cache key of the file (see _pdf_cache_key)."""
+        with self._lock:
+            if self._key is None:
+                self._key = _pdf_cache_key(self.path)
+            return self._key
+
+    @property
+    def pages(self):
+        """Page texts after normalize_pages() (see normalization for the savings)."""
+        with self._lock:
+            if self._pages is None:
+                self._pages = normalize_pages(extract_pdf_text(self.path, use_cache=self.use_cache),
+                                              stats=self.normalization)
+            return self._pages
+
+    @property
+    def text(self):
+        return '\n'.join(self.pages)
+
+    @property
+    def metadata(self):
+        return self._load_info()['metadata']
+
+    @property
+    def sections(self):
+        if self._sections is None:
+            toc = self._load_info()['toc']
+            if toc:
+                headings = [(level, title, page) for level, title, page in toc if page > 0]
+            else:
+                headings = []
+                for page_number, text in enumerate(self.pages, start=1):
+                    for line in text.split('\n'):
+                        match = _HEADING_LINE_RE.match(line)
+                        if match:
+                            number, title = match.groups()
+                            headings.append((number.count('.') + 1, f'{number} {title.strip()}', page_number))
+            self._sections = _spans_from_headings(headings, self.metadata['page_count'])
+        return self._sections
+
+    def section_text(self, span):
+        """Text of the pages a section span covers."""
+        return '\n'.join(self.pages[span['first_page'] - 1:span['last_page']])
+
+    def _load_info(self):
+        """Metadata and outline - read once, cached next to the page text."""
+        key = self.key.replace('pages-', 'info-', 1)
+        with self._lock:
+            if self._info is None:
+                cached = _pdf_cache.get(key) if self.use_cache else None
+                if cached is None:
+                    doc = fitz.open(self.path)
+                    try:
+                        metadata = {k: v for k, v in (doc.metadata or {}).items() if v}
+                        metadata['page_count'] = len(doc)
+                        metadata['file_size'] = os.path.getsize(self.path)
+                        cached = {'metadata': metadata, 'toc': doc.get_toc()}
+                    finally:
+                        doc.close()
+                    if self.use_cache:
+                        _pdf_cache.put(key, cached)
+                self._info = cached
+            return self._info
+
+
+class DocumentStore:
+    """The input PDFs of one tender, by role (methodology, notice, datasheet, atr).
+
+    Each file is extracted at most once per store, on first use, however many
+    sections read it - also when two roles point at the same file. Safe to
+    share between the threads of a full-proposal run.
+    """
+
+    def __init__(self, paths, use_cache=True):
+        self.paths = {role: path for role, path in paths.items() if path}
+        self.use_cache = use_cache
+        self._lock = threading.Lock()
+        self._documents = {}
+
+    def __contains__(self, role):
+        return role in self.paths
+
+    def __getitem__(self, role):
+        path = os.path.abspath(self.paths[role])
+        with self._lock:
+            if path not in self._documents:
+                self._documents[path] = ExtractedDocument(self.paths[role], use_cache=self.use_cache)
+            return self._documents[path]
+
+    def get(self, role):
+        return self[role] if role in self else None
+
+    def pages(self, role):
+        return self[role].pages
+
+
+# ---------------------------------------------------------------------------
+# CHUNKING
+# ---------------------------------------------------------------------------
+# Rough chars-per-token ratio for Romanian technical text
+CHARS_PER_TOKEN = 3.5
+# PTE output restates the methodology almost 1:1, with some added structure
+PTE_OUTPUT_RATIO = 1.2
+# Share of max_tokens a chunk is sized for (headroom for estimation error)
+PTE_OUTPUT_SAFETY = 0.75
+PTE_MAX_TOKENS = 16384
+
+# Numbered headings ("3.", "3.2.1 ..."), chapter markers and lettered points
+_SECTION_RE = re.compile(r'^\s*(?:\d+(?:\.\d+)*\.?\s+\S|CAPITOLUL\b|Capitolul\b|[A-Z]\)\s|[a-z]\)\s)')
+_SENTENCE_END_RE = re.compile(r'(?<=[.;:!?])\s+')
+
+
+def _estimate_tokens(text):
+    """Cheap token estimate - good enough for sizing requests."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def _split_blocks(text):
+    """Split extracted PDF text into paragraphs.
+
+    Returns (block_text, starts_section) tuples. PyMuPDF emits one line per
+    visual line, so paragraphs are either blank-line separated or end with
+    terminal punctuation followed by a heading, bullet or capitalized line.
+    """
+    blocks = []
+    current = []
+    current_is_section = False
+
+    def _flush():
+        nonlocal current, current_is_section
+        if current:
+            blocks.append(('\n'.join(current), current_is_section))
+        current = []
+        current_is_section = False
+
+    for raw in text.split('\n'):
+        line = raw.rstrip()
+        stripped = line.strip()
+        if not stripped:
+            _flush()
+            continue
+
+        is_section = bool(_SECTION_RE.match(stripped))
+        is_bullet = stripped[0] in '-•–▪●'
+        prev = current[-1].strip() if current else ''
+        ends_sentence = prev.endswith(('.', ':', ';', '!', '?'))
+
+        if current and (is_section or (ends_sentence and (is_bullet or stripped[0].isupper()))):
+            _flush()
+        if not current:
+            current_is_section = is_section
+        current.append(line)
+
+    _flush()
+    return blocks
+
+
+def _split_oversized(block, limit_tokens):
+    """Split a single block that alone exceeds the chunk budget, on sentence boundaries."""
+    pieces = []
+    current = ''
+    max_chars = int(limit_tokens * CHARS_PER_TOKEN)
+    sentences = []
+    for sentence in _SENTENCE_END_RE.split(block):
+        # Last resort for text with no punctuation at all: hard cut by length
+        sentences.extend(sentence[k:k + max_chars] for k in range(0, len(sentence), max_chars))
+    for sentence in sentences:
+        candidate = f"{current} {sentence}" if current else sentence
+        if current and _estimate_tokens(candidate) > limit_tokens:
+            pieces.append(current)
+            current = sentence
+        else:
+            current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def _to_blocks(text, limit):
+    """Paragraph blocks of text, with blocks larger than limit tokens split up."""
+    blocks = []
+    for block, is_section in _split_blocks(text):
+        if _estimate_tokens(block) > limit:
+            pieces = _split_oversized(block, limit)
+            blocks.append((pieces[0], is_section))
+            blocks.extend((p, False) for p in pieces[1:])
+        else:
+            blocks.append((block, is_section))
+    return blocks
+
+
+def _block_positions(blocks):
+    """pos[i] = estimated tokens before block i (pos[-1] is the total)."""
+    pos = [0]
+    for block, _ in blocks:
+        pos.append(pos[-1] + _estimate_tokens(block))
+    return pos
+
+
+def chunk_methodology(pages, max_tokens=PTE_MAX_TOKENS, output_ratio=PTE_OUTPUT_RATIO):
+    """Split methodology pages into chunks whose expected output fits max_tokens.
+
+    The same chunks iter_chunks() yields for these pages one by one, so a
+    document gets the same requests (and response cache keys) whether its
+    pages are streamed or read up front.
+    """
+    return [chunk for chunk, _ in iter_chunks(pages, max_tokens=max_tokens, output_ratio=output_ratio)]
+
+
+def _balanced_chunks(text, limit):
+    """Split text into chunks of at most limit tokens, cut on section and paragraph boundaries.
+
+    Chunks are balanced so they all have roughly the same size (no single
+    call becomes the straggler).
+    """
+    if not text.strip() or _estimate_tokens(text) <= limit:
+        return [text]
+
+    blocks = _to_blocks(text, limit)
+    pos = _block_positions(blocks)
+    total = pos[-1]
+
+    num_chunks = math.ceil(total / limit)
+    while True:
+        cuts = _balanced_cuts(blocks, pos, num_chunks)
+        spans = list(zip(cuts, cuts[1:]))
+        if all(pos[end] - pos[start] <= limit for start, end in spans) or num_chunks >= len(blocks):
+            break
+        num_chunks += 1
+
+    return ['\n'.join(b for b, _ in blocks[start:end]) for start, end in spans]
+
+
+def iter_chunks(pages, max_tokens=PTE_MAX_TOKENS, output_ratio=PTE_OUTPUT_RATIO):
+    """Chunk methodology pages as they arrive: yields (chunk, last) pairs.
+
+    A chunk is yielded as soon as enough pages have arrived to fill one, cut
+    at a section or paragraph boundary; the leftover text is carried into the
+    next chunk, so such a chunk is never the last one. Once pages run out, the
+    tail is split into balanced chunks (the last one flagged), so a document
+    that fits one chunk is known to be a single call before it is sent.
+    """
+    # Max input tokens per chunk so that input * output_ratio fits the output budget
+    limit = max(1, int(max_tokens * PTE_OUTPUT_SAFETY / output_ratio))
+    buffer = ''
+    yielded = False
+    for page in pages:
+        buffer = f'{buffer}\n{page}' if buffer else page
+        while _estimate_tokens(buffer) > limit:
+            blocks = _to_blocks(buffer, limit)
+            pos = _block_positions(blocks)
+            fits = [i for i in range(1, len(blocks)) if pos[i] <= limit]
+            if not fits:
+                break
+            # Prefer a section heading in the last 15% of the budget
+            sections = [i for i in fits if blocks[i][1] and pos[i] >= 0.85 * limit]
+            cut = max(sections or fits)
+            yield '\n'.join(b for b, _ in blocks[:cut]), False
+            yielded = True
+            buffer = '\n'.join(b for b, _ in blocks[cut:])
+
+    if yielded and not buffer.strip():
+        return
+    tail = _balanced_chunks(buffer, limit)
+    for i, chunk in enumerate(tail):
+        yield chunk, i == len(tail) - 1
+
+
+def _balanced_cuts(blocks, pos, num_chunks):
+    """Pick block indices to cut at so chunks are ~equal, preferring section starts."""
+    total = pos[-1]
+    target = total / num_chunks
+    window = 0.15 * target
+    cuts = [0]
+    for k in range(1, num_chunks):
+        ideal = k * target
+        lo = max(cuts[-1] + 1, bisect.bisect_left(pos, ideal - window))
+        hi = min(len(blocks) - 1, bisect.bisect_right(pos, ideal + window) - 1)
+        candidates = [i for i in range(lo, hi + 1) if blocks[i][1]]
+        if not candidates:
+            # No heading nearby: cut at the closest paragraph boundary
+            nearest = bisect.bisect_left(pos, ideal)
+            candidates = [i for i in (nearest - 1, nearest) if cuts[-1] < i < len(blocks)]
+        if candidates:
+            cuts.append(min(candidates, key=lambda i: abs(pos[i] - ideal)))
+    cuts.append(len(blocks))
+    return cuts
+
+
+# ---------------------------------------------------------------------------
+# CONTEXT PRUNING
+# ---------------------------------------------------------------------------
+# Documents up to this size are always sent whole
+PRUNE_MIN_TOKENS = 4000
+# Size of the passages that are scored and picked
+PRUNE_PASSAGE_TOKENS = 250
+# Best passages kept for each query
+PRUNE_TOP_K = 3
+# Upper bound for all documents together after pruning
+PRUNE_MAX_TOKENS = 24000
+BM25_K1 = 1.5
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r'\w+')
+# Field and topic lines of a prompt template: "- Titlu contract: [...]", "3. Securizarea ..."
+_QUERY_LINE_RE = re.compile(r'^\s*(?:-|\d+\.)\s+(.+)$')
+_DOCUMENT_FIELD_RE = re.compile(r'\{\w+_text\}')
+# Romanian words too common to tell passages apart
+_STOPWORDS = frozenset('''
+    acest aceasta aceste acestei acestor acel acea ale alte are asupra avea care catre cel cea
+    cele celor cum dar daca din doar este fara fie fost intre iar lor mai nici noi pana pentru
+    prin sau sub sunt toate toti unde unei unor unui vor
+'''.split())
+# Crude stemming for an inflected language: compare word prefixes
+_STEM_CHARS = 6
+
+
+def _terms(text):
+    """Lowercase, diacritics-free word stems for BM25."""
+    decomposed = unicodedata.normalize('NFKD', text.lower())
+    plain = ''.join(c for c in decomposed if not unicodedata.combining(c))
+    return [word[:_STEM_CHARS] for word in _WORD_RE.findall(plain)
+            if len(word) > 2 and not word.isdigit() and word not in _STOPWORDS]
+
+
+class BM25:
+    """Okapi BM25 over a fixed list of tokenized passages."""
+
+    def __init__(self, passages_terms, k1=BM25_K1, b=BM25_B):
+        self.k1 = k1
+        self.b = b
+        self.lengths = [len(terms) for terms in passages_terms]
+        self.avg_length = (sum(self.lengths) / len(self.lengths)) if self.lengths else 1
+        self.postings = {}
+        for i, terms in enumerate(passages_terms):
+            for term, count in Counter(terms).items():
+                self.postings.setdefault(term, []).append((i, count))
+        n = len(passages_terms)
+        self.idf = {term: math.log(1 + (n - len(p) + 0.5) / (len(p) + 0.5))
+                    for term, p in self.postings.items()}
+
+    def scores(self, query_terms):
+        scores = [0.0] * len(self.lengths)
+        for term in set(query_terms):
+            idf = self.idf.get(term)
+            if not idf:
+                continue
+            for i, count in self.postings[term]:
+                norm = 1 - self.b + self.b * self.lengths[i] / (self.avg_length or 1)
+                scores[i] += idf * count * (self.k1 + 1) / (count + self.k1 * norm)
+        return scores
+
+
+def prompt_queries(template):
+    """Retrieval queries from a prompt template, one per field or topic it asks for.
+
+    Bullet and numbered lines before the input documents are used, without
+    their {placeholders}.
+    """
+    head = _DOCUMENT_FIELD_RE.split(template, maxsplit=1)[0]
+    queries = []
+    for line in head.split('\n'):
+        match = _QUERY_LINE_RE.match(line)
+        if match:
+            query = re.sub(r'\{\w+\}', ' ', match.group(1)).strip()
+            if _terms(query):
+                queries.append(query)
+    return queries
+
+
+def _passages(pages):
+    """(page_number, text) passages of about PRUNE_PASSAGE_TOKENS, never crossing pages."""
+    passages = []
+    for page_number, page in enumerate(pages, start=1):
+        current = ''
+        for block, _ in _to_blocks(page, PRUNE_PASSAGE_TOKENS):
+            if current and _estimate_tokens(current) + _estimate_tokens(block) > PRUNE_PASSAGE_TOKENS:
+                passages.append((page_number, current))
+                current = block
+            else:
+                current = f"{current}\n{block}" if current else block
+        if current:
+            passages.append((page_number, current))
+    return passages
+
+
+def prune_context(documents, queries, max_tokens=PRUNE_MAX_TOKENS, top_k=PRUNE_TOP_K, keep_openings=True):
+    """Keep only the passages of large documents that are relevant to the queries.
+
+    documents maps a name to its page texts. Every query keeps its top_k BM25
+    passages within max_tokens overall; with keep_openings, the opening
+    passage of each document (where titles and reference numbers are) is kept
+    even when the small documents alone use up the budget. Kept passages stay
+    in document order, with page markers and "[...]" for the gaps.
+    Returns ({name: text}, tokens_before, tokens_after) - estimated tokens.
+    """
+    texts = {name: '\n'.join(pages) for name, pages in documents.items()}
+    before = sum(_estimate_tokens(text) for text in texts.values())
+    large = [name for name, text in texts.items() if _estimate_tokens(text) > PRUNE_MIN_TOKENS]
+    if not large or not queries:
+        return texts, before, before
+
+    passages = [(name, page, text) for name in large for page, text in _passages(documents[name])]
+    index = BM25([_terms(text) for _, _, text in passages])
+
+    # Opening passages are kept whatever the budget
+    chosen = set()
+    for name in large if keep_openings else ():
+        chosen.add(next(i for i, passage in enumerate(passages) if passage[0] == name))
+
+    relevance = {}
+    for query in queries:
+        scores = index.scores(_terms(query))
+        top = sorted(range(len(scores)), key=scores.__getitem__, reverse=True)[:top_k]
+        peak = scores[top[0]] if top else 0
+        for i in top:
+            if scores[i] > 0:
+                relevance[i] = max(relevance.get(i, 0), scores[i] / peak)
+
+    # Most relevant first until the budget left by the small documents is used up
+    budget = max(0, max_tokens - sum(_estimate_tokens(texts[name]) for name in texts if name not in large))
+    used = sum(_estimate_tokens(passages[i][2]) for i in chosen)
+    for i in sorted(relevance, key=relevance.get, reverse=True):
+        if i in chosen:
+            continue
+        cost = _estimate_tokens(passages[i][2])
+        if used + cost <= budget:
+            chosen.add(i)
+            used += cost
+
+    for name in large:
+        parts = []
+        previous = None
+        for i, (passage_name, page, text) in enumerate(passages):
+            if passage_name != name or i not in chosen:
+                continue
+            if previous is None or i != previous + 1:
+                if parts:
+                    parts.append('[...]')
+                parts.append(f'[pag. {page}]')
+            parts.append(text)
+            previous = i
+        texts[name] = '\n'.join(parts)
+
+    after = sum(_estimate_tokens(text) for text in texts.values())
+    return texts, before, after
 
 
 # ---------------------------------------------------------------------------
@@ -47,98 +856,845 @@ def extract_pdf_text(pdf_path):
 SYSTEM_PROMPT_PTE = _load_prompt('system_pte.txt')
 SYSTEM_PROMPT_REZUMAT = _load_prompt('system_rezumat.txt')
 
+# Max number of PTE chunks streamed from the API at the same time
+PTE_MAX_WORKERS = 4
+# Finished chunks of an interrupted PTE run, kept so a rerun resumes from the failed chunk
+PTE_CHECKPOINT_TTL = 7 * 24 * 3600
+_pte_checkpoints = DiskCache(os.path.join(CACHE_DIR, 'checkpoints'), ttl=PTE_CHECKPOINT_TTL)
+# Max seconds to hold back the other chunks while the first one writes the prompt cache
+PROMPT_CACHE_WARMUP_TIMEOUT = 30
+# Shortest prompt prefix (tokens) each model caches; shorter ones are not worth waiting for
+PROMPT_CACHE_MIN_TOKENS = {'claude-haiku-4-5-20251001': 4096}
+PROMPT_CACHE_MIN_TOKENS_DEFAULT = 1024
+
+
+class TokenUsage:
+    """Thread-safe running totals of API usage across one or more calls."""
+
+    FIELDS = ('api_calls', 'cached_responses', 'input_tokens', 'output_tokens',
+              'cache_read_tokens', 'cache_write_tokens', 'pruned_tokens', 'batch_requests',
+              'cost_usd', 'routed_calls', 'cost_saved_usd', 'seconds_saved')
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._totals = dict.fromkeys(self.FIELDS, 0)
+
+    def add(self, **counts):
+        with self._lock:
+            for name, value in counts.items():
+                self._totals[name] += value or 0
+
+    def __getattr__(self, name):
+        if name in TokenUsage.FIELDS:
+            with self._lock:
+                return self._totals[name]
+        raise AttributeError(name)
+
+    def as_dict(self):
+        with self._lock:
+            return {name: round(value, 4) if isinstance(value, float) else value
+                    for name, value in self._totals.items()}
+
+
+def _cacheable_system(*parts):
+    """System prompt as text blocks, with a prompt-cache breakpoint after the last one.
+
+    Anthropic caches the whole prefix up to the breakpoint, so repeated calls
+    with the same system prompt (every PTE chunk, every Rezumat run) read it
+    from the cache instead of reprocessing it. Prefixes shorter than the
+    model's minimum cacheable length are simply not cached.
+    """
+    blocks = [{"type": "text", "text": part} for part in parts if part]
+    blocks[-1]["cache_control"] = {"type": "ephemeral"}
+    return blocks
+
+
+def _prefix_cacheable(model, system):
+    """Whether the (estimated) system prompt is long enough for model to cache it."""
+    return _prompt_tokens(system, []) >= PROMPT_CACHE_MIN_TOKENS.get(model, PROMPT_CACHE_MIN_TOKENS_DEFAULT)
+
+
+# Cached responses expire after RESPONSE_CACHE_TTL seconds; at most
+# RESPONSE_CACHE_MAX_ENTRIES are kept (least recently used evicted first)
+RESPONSE_CACHE_TTL = 30 * 24 * 3600
+RESPONSE_CACHE_MAX_ENTRIES = 1000
+_response_cache = DiskCache(
+    os.path.join(CACHE_DIR, 'responses'),
+    max_entries=RESPONSE_CACHE_MAX_ENTRIES,
+    ttl=RESPONSE_CACHE_TTL,
+)
+
+
+def _response_cache_key(model, system, user_prompt, max_tokens):
+    payload = json.dumps(
+        {'model': model, 'system': system, 'user': user_prompt, 'max_tokens': max_tokens},
+        ensure_ascii=False, sort_keys=True,
+    )
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+# Retries of a failed API call (rate limit, overload, 5xx, connection errors)
+API_MAX_RETRIES = 5
+# Exponential backoff: random wait up to base * 2^attempt, capped
+API_BACKOFF_BASE = 2.0
+API_BACKOFF_MAX = 60.0
+# Longest retry-after from the API that is waited out
+API_RETRY_AFTER_MAX = 120.0
+
+# Continuation calls for a response cut off at max_tokens
+API_MAX_CONTINUATIONS = 3
+# Characters of a continuation checked for text repeated from before the seam
+SEAM_CHECK_CHARS = 400
+SEAM_MIN_OVERLAP = 20
+
+_RETRYABLE_ERRORS = (anthropic.RateLimitError, anthropic.OverloadedError, anthropic.InternalServerError,
+                     anthropic.ServiceUnavailableError, anthropic.APIConnectionError)
+
+
+def _is_retryable(error):
+    """Transient API failure worth retrying (also errors sent inside a stream)."""
+    if isinstance(error, _RETRYABLE_ERRORS):
+        return True
+    if isinstance(error, anthropic.APIStatusError) and isinstance(error.body, dict):
+        error_type = (error.body.get('error') or {}).get('type')
+        return error_type in ('rate_limit_error', 'overloaded_error', 'api_error')
+    return False
+
+
+def _retry_after(error):
+    """Seconds the API asked to wait (retry-after-ms / retry-after headers), or None."""
+    response = getattr(error, 'response', None)
+    if response is None:
+        return None
+    headers = response.headers
+    try:
+        if headers.get('retry-after-ms'):
+            return float(headers['retry-after-ms']) / 1000
+        value = headers.get('retry-after')
+        if value:
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        pass
+    return None
+
+
+def _trim_overlap(previous, text):
+    """Drop the start of a continuation that repeats the end of the text it continues."""
+    lead = len(text) - len(text.lstrip())
+    body = text[lead:]
+    for size in range(min(len(previous), len(body)), SEAM_MIN_OVERLAP - 1, -1):
+        if previous.endswith(body[:size]):
+            return body[size:]
+    return text
+
+
+def _backoff_delay(attempt, error):
+    """Jittered exponential backoff; a retry-after from the API takes precedence."""
+    retry_after = _retry_after(error)
+    if retry_after is not None:
+        return min(retry_after, API_RETRY_AFTER_MAX) + random.uniform(0, 1)
+    return random.uniform(0, min(API_BACKOFF_MAX, API_BACKOFF_BASE * 2 ** attempt))
+
+
+# Account limits per model, per minute: {'rpm': ..., 'itpm': ..., 'otpm': ...}
+# ("rateLimits" in config.json). Limits not configured are taken from the
+# anthropic-ratelimit-* headers of the API's responses.
+RATE_LIMITS = rate_limits
+# Share of max_tokens reserved for a call's output until its real size is known
+RATE_OUTPUT_ESTIMATE = 0.5
+_RATE_HEADERS = {'rpm': 'requests', 'itpm': 'input-tokens', 'otpm': 'output-tokens'}
+
+# Admission priority of API calls (lower goes first). Headless bulk runs use
+# API_PRIORITY_BACKGROUND so they make room for someone waiting in the GUI.
+API_PRIORITY_INTERACTIVE = 0
+API_PRIORITY_BACKGROUND = 10
+_api_priority = contextvars.ContextVar('api_priority', default=API_PRIORITY_INTERACTIVE)
+
+
+@contextmanager
+def api_priority(priority):
+    """Run the API calls made inside the block (and in pools started with _submit) at priority."""
+    token = _api_priority.set(priority)
+    try:
+        yield
+    finally:
+        _api_priority.reset(token)
+
+
+def _submit(pool, fn, *args):
+    """pool.submit() that keeps the caller's API priority in the worker thread."""
+    return pool.submit(contextvars.copy_context().run, fn, *args)
+
+
+class _ModelBuckets:
+    """Token buckets of one model: requests, input and output tokens per minute."""
+
+    def __init__(self, limits):
+        self.limits = limits
+        self.levels = dict(limits)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.queue = []
+
+    def refill(self, now):
+        elapsed = now - self.updated
+        self.updated = now
+        for name, limit in self.limits.items():
+            if limit:
+                self.levels[name] = min(limit, self.levels[name] + limit * elapsed / 60)
+
+    def wait_time(self, costs, now):
+        """Seconds until every bucket holds the costs (capped at the bucket size)."""
+        wait = max(0.0, self.paused_until - now)
+        for name, cost in costs.items():
+            limit = self.limits[name]
+            if limit:
+                missing = min(cost, limit) - self.levels[name]
+                if missing > 0:
+                    wait = max(wait, missing * 60 / limit)
+        return wait
+
+
+class RateGovernor:
+    """Process-wide admission of API calls against the account's per-model limits.
+
+    Each model has continuously refilled buckets for requests, input tokens and
+    output tokens per minute. A call reserves its estimated cost before it
+    starts and settles its real usage when it ends, so concurrent generations
+    share the limits instead of each finding them with 429s. Waiting calls are
+    admitted by priority, first come first served within a priority.
+    """
+
+    def __init__(self, limits=None):
+        self._limits = limits or {}
+        self._cond = threading.Condition()
+        self._models = {}
+        self._seq = itertools.count()
+
+    def _buckets(self, model):
+        if model not in self._models:
+            configured = self._limits.get(model, {})
+            self._models[model] = _ModelBuckets({name: configured.get(name) for name in _RATE_HEADERS})
+        return self._models[model]
+
+    def acquire(self, model, input_tokens, output_tokens, priority=None):
+        """Block until the call fits the model's limits; returns the reserved costs.
+
+        priority defaults to the caller's (see api_priority()).
+        """
+        costs = {'rpm': 1, 'itpm': input_tokens, 'otpm': output_tokens}
+        entry = (_api_priority.get() if priority is None else priority, next(self._seq))
+        with self._cond:
+            buckets = self._buckets(model)
+            heapq.heappush(buckets.queue, entry)
+            try:
+                while True:
+                    now = time.monotonic()
+                    buckets.refill(now)
+                    if buckets.queue[0] != entry:
+                        self._cond.wait()
+                        continue
+                    wait = buckets.wait_time(costs, now)
+                    if wait <= 0:
+                        break
+                    self._cond.wait(wait)
+                for name, cost in costs.items():
+                    if buckets.limits[name]:
+                        buckets.levels[name] -= cost
+            finally:
+                buckets.queue.remove(entry)
+                heapq.heapify(buckets.queue)
+                self._cond.notify_all()
+        return costs
+
+    def release(self, model, costs, input_tokens=None, output_tokens=None, headers=None):
+        """Settle a call: charge its real usage instead of the estimate (None keeps the estimate).
+
+        headers (of the API response) update the limits that are not configured
+        and bring the buckets down to what the API reports as remaining.
+        """
+        with self._cond:
+            buckets = self._buckets(model)
+            buckets.refill(time.monotonic())
+            for name, used in (('itpm', input_tokens), ('otpm', output_tokens)):
+                if used is not None and buckets.limits[name]:
+                    buckets.levels[name] += costs[name] - used
+            if headers is not None:
+                self._observe(model, buckets, headers)
+            self._cond.notify_all()
+
+    def pause(self, model, seconds):
+        """Hold every call to the model for seconds (after the API refused one)."""
+        with self._cond:
+            buckets = self._buckets(model)
+            buckets.paused_until = max(buckets.paused_until, time.monotonic() + seconds)
+            self._cond.notify_all()
+
+    def _observe(self, model, buckets, headers):
+        configured = self._limits.get(model, {})
+        for name, header in _RATE_HEADERS.items():
+            try:
+                limit = float(headers.get(f'anthropic-ratelimit-{header}-limit') or 0)
+                remaining = headers.get(f'anthropic-ratelimit-{header}-remaining')
+                remaining = float(remaining) if remaining is not None else None
+            except (TypeError, ValueError):
+                continue
+            if limit and name not in configured and buckets.limits[name] != limit:
+                if buckets.limits[name] is None:
+                    buckets.levels[name] = limit
+                buckets.limits[name] = limit
+            if remaining is not None and buckets.limits[name]:
+                buckets.levels[name] = min(buckets.levels[name], remaining)
+
+
+_rate_governor = RateGovernor(RATE_LIMITS)
+
+_clients = {}
+_clients_lock = threading.Lock()
+
+
+def api_client(api_key):
+    """The process-wide client for an API key - one connection pool shared by every call."""
+    with _clients_lock:
+        client = _clients.get(api_key)
+        if client is None:
+            # Retries are done by _stream_claude (with resume of broken streams)
+            client = _clients[api_key] = anthropic.Anthropic(api_key=api_key, max_retries=0)
+        return client
+
+
+def _prompt_tokens(system, messages):
+    """Estimated input tokens of a request, for admission."""
+    texts = [system] if isinstance(system, str) else [block['text'] for block in system]
+    texts += [message['content'] for message in messages]
+    return sum(_estimate_tokens(text) for text in texts)
+
+
+# Model routing: easy work goes to a cheaper, faster model instead of the one
+# selected ("modelRouting" in config.json overrides these settings). Rules per
+# task: 'fast', 'selected', or 'auto' - fast when the text is short or mostly
+# mechanical (table rows and numeric lines: quantities, codes, prices).
+# The Rezumat parts stay on the selected model: they share a system prompt
+# with the input documents, which 1.3 has just written to the prompt cache,
+# and prompt caches are per model - on the fast model, 1.1 would pay a fresh
+# cache write of the whole prefix instead of a cache read.
+_ROUTING_DEFAULTS = {
+    'enabled': True,
+    'fastModel': 'claude-haiku-4-5-20251001',
+    'rules': {'pte': 'auto', 'rezumat-1.1': 'selected', 'rezumat-1.2': 'selected', 'rezumat-1.3': 'selected'},
+    # 'auto': texts up to this many (estimated) tokens
+    'shortTokens': 1500,
+    # 'auto': or with at least this share of mechanical lines
+    'mechanicalShare': 0.6,
+}
+ROUTING = dict(_ROUTING_DEFAULTS, **model_routing)
+ROUTING['rules'] = dict(_ROUTING_DEFAULTS['rules'], **model_routing.get('rules', {}))
+# Column separators of a table row: a pipe, a tab or a run of spaces between cells
+_COLUMN_SEPARATOR_RE = re.compile(r'\||\t|\S {2,}\S')
+
+# USD per million tokens, (input, output); cache reads cost 0.1x and cache writes
+# 1.25x the input price, batch requests half of everything
+MODEL_PRICES = {
+    'claude-haiku-4-5-20251001': (1.0, 5.0),
+    'claude-sonnet-4-20250514': (3.0, 15.0),
+    'claude-opus-4-20250514': (15.0, 75.0),
+}
+# Typical output tokens per second, for estimating the time a routed call saved
+MODEL_SPEEDS = {
+    'claude-haiku-4-5-20251001': 150,
+    'claude-sonnet-4-20250514': 60,
+    'claude-opus-4-20250514': 30,
+}
+
+
+def _mechanical_share(text):
+    """Share of the non-empty lines that are table rows or mostly digits and punctuation.
+
+    Length alone does not count: narrative text wrapped into short lines is
+    prose all the same.
+    """
+    lines = [line.strip() for line in text.splitlines() if line.strip()]
+    if not lines:
+        return 1.0
+
+    def _mechanical(line):
+        if _COLUMN_SEPARATOR_RE.search(line):
+            return True
+        chars = [c for c in line if not c.isspace()]
+        return sum(c.isalpha() for c in chars) < len(chars) / 2
+
+    return sum(1 for line in lines if _mechanical(line)) / len(lines)
+
+
+def route_model(task, model, text=None):
+    """The model for one request and why: (model, reason); reason is None when it stays on model.
+
+    task names a ROUTING rule ('pte', 'rezumat-1.1', ...); tasks without a
+    rule keep the selected model. 'auto' rules look at text.
+    """
+    fast = ROUTING['fastModel']
+    rule = ROUTING['rules'].get(task, 'selected')
+    if not ROUTING['enabled'] or model == fast:
+        return model, None
+    if rule == 'fast':
+        return fast, "regulă"
+    if rule == 'auto' and text is not None:
+        tokens = _estimate_tokens(text)
+        if tokens <= ROUTING['shortTokens']:
+            return fast, f"text scurt, ~{tokens} tokeni"
+        share = _mechanical_share(text)
+        if share >= ROUTING['mechanicalShare']:
+            return fast, f"{round(100 * share)}% rânduri mecanice"
+    return model, None
+
+
+def _call_cost(model, input_tokens, output_tokens, cache_read=0, cache_write=0):
+    """Estimated USD cost of a call's tokens at model's prices (None for an unknown model)."""
+    price = MODEL_PRICES.get(model)
+    if price is None:
+        return None
+    return (price[0] * (input_tokens + 0.1 * cache_read + 1.25 * cache_write) + price[1] * output_tokens) / 1e6
+
+
+def _add_cost(usage, model, baseline_model, input_tokens, output_tokens, cache_read=0, cache_write=0,
+              batch=False, baseline_warm=False):
+    """Add a call's estimated cost to usage and, for a routed call, what it saved against baseline_model.
+
+    With baseline_warm the prompt prefix was already cached on baseline_model
+    (by the run's other requests), so what the routed call wrote to its own
+    cache would have been a cache read there.
+    """
+    factor = 0.5 if batch else 1.0
+    cost = _call_cost(model, input_tokens, output_tokens, cache_read, cache_write)
+    if cost is not None:
+        usage.add(cost_usd=cost * factor)
+    if baseline_model is None or baseline_model == model:
+        return
+    if baseline_warm:
+        baseline_cost = _call_cost(baseline_model, input_tokens, output_tokens, cache_read + cache_write)
+    else:
+        baseline_cost = _call_cost(baseline_model, input_tokens, output_tokens, cache_read, cache_write)
+    usage.add(routed_calls=1)
+    if cost is not None and baseline_cost is not None:
+        usage.add(cost_saved_usd=(baseline_cost - cost) * factor)
+    if not batch and model in MODEL_SPEEDS and baseline_model in MODEL_SPEEDS:
+        usage.add(seconds_saved=output_tokens / MODEL_SPEEDS[baseline_model] - output_tokens / MODEL_SPEEDS[model])
+
+
+def _report_cost(usage, progress_callback):
+    """Log the run's estimated cost and what model routing saved; nothing when no API call was made."""
+    if not progress_callback or not (usage.api_calls or usage.batch_requests):
+        return
+    message = f"Cost estimat: ${usage.cost_usd:.4f}"
+    if usage.routed_calls:
+        message += (f"; {usage.routed_calls} apeluri rutate către {ROUTING['fastModel']} au economisit "
+                    f"~${usage.cost_saved_usd:.4f} și ~{usage.seconds_saved:.0f} s de generare")
+    progress_callback(message)
+
+
+def _stream_claude(client, model, system, user_prompt, progress_callback=None, chunk_label="",
+                   max_tokens=16384, use_cache=True, on_start=None, usage=None, on_text=None,
+                   baseline_model=None, baseline_warm=False):
+    """Make a single streaming Claude API call and return the result text.
+
+    system is a string or a list of text blocks (see _cacheable_system()).
+    With use_cache, an identical earlier request (same model, prompts and
+    max_tokens) is answered from the local response cache without calling the API.
+    on_start is called once the API has started answering (the prompt cache
+    is written by then), or right away on a response cache hit. Token counts
+    are added to usage (a TokenUsage) when given. on_text receives the
+    response text fragment by fragment, as it streams in. baseline_model is
+    the model selected for the run when route_model() picked another one;
+    usage then also gets what the call saved against it (baseline_warm: the
+    system prompt is already cached on baseline_model, see _add_cost()).
+
+    Transient errors are retried up to API_MAX_RETRIES times with jittered
+    exponential backoff (or the API's retry-after). If the stream broke after
+    some text arrived, the retry continues from that text (sent back as the
+    start of the assistant turn), so on_text never receives anything twice.
+    A response cut off at max_tokens is continued the same way, up to
+    API_MAX_CONTINUATIONS times; text a continuation repeats from before the
+    seam is dropped. A response still cut off after that is returned but not
+    put in the response cache, so a later run asks again. Every call is admitted by the process-wide rate governor
+    first (see RateGovernor).
+    """
+    if use_cache:
+        cache_key = _response_cache_key(model, system, user_prompt, max_tokens)
+        cached = _response_cache.get(cache_key)
+        if cached is not None:
+            if on_start:
+                on_start()
+            if progress_callback:
+                progress_callback(
+                    f"  {chunk_label}Răspuns preluat din cache. "
+                    f"Input: {cached['input_tokens']} tokeni, Output: {cached['output_tokens']} tokeni"
+                )
+            if usage is not None:
+                usage.add(cached_responses=1)
+            if on_text:
+                on_text(cached['text'])
+            return cached['text'], cached['input_tokens'], cached['output_tokens']
 
-def _stream_claude(client, model, system, user_prompt, progress_callback=None, chunk_label="", max_tokens=16384):
-    """Make a single streaming Claude API call and return the result text."""
     result_parts = []
     chars_received = 0
+    attempt = 0
+    continuations = 0
+    api_calls = input_tokens = output_tokens = cache_write = cache_read = 0
+
+    def _deliver(text):
+        nonlocal chars_received
+        result_parts.append(text)
+        if on_text:
+            on_text(text)
+        chars_received += len(text)
+        if chars_received % 500 < 50 and progress_callback:
+            progress_callback(f"  {chunk_label}Se generează... {chars_received} caractere primite")
+
+    while True:
+        messages = [{"role": "user", "content": user_prompt}]
+        received = ''.join(result_parts)
+        prefill = received.rstrip()
+        if prefill:
+            # Resume a broken or truncated response: the model continues the text already delivered
+            messages.append({"role": "assistant", "content": prefill})
+        # Whitespace already delivered after the prefill must not be repeated
+        skip_space = len(prefill) < len(received)
+        # The start of a continuation is held back until the seam can be checked for repeated text
+        seam = [] if prefill else None
+
+        # Wait for room under the account limits, shared with every other call in the
+        # process; finishing a response already being rendered goes before new ones
+        costs = _rate_governor.acquire(model, _prompt_tokens(system, messages),
+                                       int(max_tokens * RATE_OUTPUT_ESTIMATE),
+                                       priority=_api_priority.get() - 1 if prefill else None)
+        headers = None
+        try:
+            with client.messages.stream(
+                model=model,
+                max_tokens=max_tokens,
+                system=system,
+                messages=messages,
+            ) as stream:
+                response = getattr(stream, 'response', None)
+                headers = response.headers if response is not None else None
+                for event in stream:
+                    if hasattr(event, 'type'):
+                        if event.type == 'message_start' and on_start:
+                            on_start()
+                        elif event.type == 'content_block_delta' and hasattr(event.delta, 'text'):
+                            text = event.delta.text
+                            if skip_space:
+                                text = text.lstrip()
+                                if not text:
+                                    continue
+                                skip_space = False
+                            if seam is not None:
+                                seam.append(text)
+                                if sum(len(part) for part in seam) < SEAM_CHECK_CHARS:
+                                    continue
+                                text = _trim_overlap(prefill, ''.join(seam))
+                                seam = None
+                                if not text:
+                                    continue
+                            _deliver(text)
+                if seam:
+                    text = _trim_overlap(prefill, ''.join(seam))
+                    if text:
+                        _deliver(text)
+
+                final_message = stream.get_final_message()
+            call_usage = final_message.usage
+            call_cache_write = getattr(call_usage, 'cache_creation_input_tokens', None) or 0
+            # Cache reads do not count towards the input tokens limit
+            _rate_governor.release(model, costs, call_usage.input_tokens + call_cache_write,
+                                   call_usage.output_tokens, headers)
+            api_calls += 1
+            input_tokens += call_usage.input_tokens
+            output_tokens += call_usage.output_tokens
+            cache_write += call_cache_write
+            cache_read += getattr(call_usage, 'cache_read_input_tokens', None) or 0
+            stop_reason = getattr(final_message, 'stop_reason', None)
+        except anthropic.APIError as e:
+            response = getattr(e, 'response', None)
+            _rate_governor.release(model, costs, headers=response.headers if response is not None else headers)
+            if not _is_retryable(e) or attempt >= API_MAX_RETRIES:
+                raise
+            delay = _backoff_delay(attempt, e)
+            attempt += 1
+            if isinstance(e, anthropic.RateLimitError):
+                # Hold the other calls to this model too, instead of each hitting the limit in turn
+                _rate_governor.pause(model, delay)
+            if progress_callback:
+                resume_info = f", se continuă de la {chars_received} caractere" if result_parts else ""
+                progress_callback(
+                    f"  {chunk_label}Eroare temporară API ({type(e).__name__}) - "
+                    f"reîncercarea {attempt}/{API_MAX_RETRIES} peste {delay:.0f} s{resume_info}"
+                )
+            time.sleep(delay)
+            continue
+        except BaseException:
+            _rate_governor.release(model, costs)
+            raise
+
+        if stop_reason != 'max_tokens' or not result_parts:
+            break
+        if continuations >= API_MAX_CONTINUATIONS:
+            if progress_callback:
+                progress_callback(
+                    f"  {chunk_label}ATENȚIE: răspunsul a atins limita de {max_tokens} tokeni și după "
+                    f"{continuations} continuări - textul poate fi incomplet"
+                )
+            break
+        continuations += 1
+        if progress_callback:
+            progress_callback(
+                f"  {chunk_label}Răspuns trunchiat la limita de {max_tokens} tokeni - "
+                f"continuarea {continuations}/{API_MAX_CONTINUATIONS} de la {chars_received} caractere"
+            )
 
-    with client.messages.stream(
-        model=model,
-        max_tokens=max_tokens,
-        system=system,
-        messages=[{"role": "user", "content": user_prompt}],
-    ) as stream:
-        for event in stream:
-            if hasattr(event, 'type'):
-                if event.type == 'content_block_delta' and hasattr(event.delta, 'text'):
-                    result_parts.append(event.delta.text)
-                    chars_received += len(event.delta.text)
-                    if chars_received % 500 < 50 and progress_callback:
-                        progress_callback(f"  {chunk_label}Se generează... {chars_received} caractere primite")
-
-        final_message = stream.get_final_message()
-        input_tokens = final_message.usage.input_tokens
-        output_tokens = final_message.usage.output_tokens
+    if usage is not None:
+        usage.add(api_calls=api_calls, input_tokens=input_tokens, output_tokens=output_tokens,
+                  cache_read_tokens=cache_read, cache_write_tokens=cache_write)
+        _add_cost(usage, model, baseline_model, input_tokens, output_tokens, cache_read, cache_write,
+                  baseline_warm=baseline_warm)
 
     if progress_callback:
+        cache_info = ""
+        if cache_write or cache_read:
+            cache_info = f", Cache: {cache_read} citiți / {cache_write} scriși"
         progress_callback(
             f"  {chunk_label}Terminat. "
-            f"Input: {input_tokens} tokeni, Output: {output_tokens} tokeni"
+            f"Input: {input_tokens} tokeni, Output: {output_tokens} tokeni{cache_info}"
         )
 
-    return ''.join(result_parts), input_tokens, output_tokens
+    result = ''.join(result_parts)
+    # A response still cut off at max_tokens is incomplete; don't serve it again
+    if use_cache and stop_reason != 'max_tokens':
+        _response_cache.put(cache_key, {
+            'text': result,
+            'input_tokens': input_tokens,
+            'output_tokens': output_tokens,
+        })
+    return result, input_tokens, output_tokens
 
 
-def generate_pte(methodology_pages, api_key, model, progress_callback=None):
-    """Call Claude API to transform methodology into PTE format.
+class _OrderedText:
+    """Forwards text from concurrently generated chunks to callback in source order.
 
-    Splits into 2 chunks only for large documents (>30K chars) to avoid output truncation.
+    Chunk 0 is forwarded live; text of later chunks is held back until every
+    chunk before them has finished, then released. Chunks are separated by a
+    blank line, like the joined result.
     """
-    client = anthropic.Anthropic(api_key=api_key)
 
-    full_text = '\n'.join(methodology_pages)
-    total_chars = len(full_text)
+    def __init__(self, callback):
+        self.callback = callback
+        self._lock = threading.Lock()
+        self._current = 0
+        self._pending = {}
+        self._finished = set()
+
+    def writer(self, index):
+        return lambda text: self.write(index, text)
 
-    # Decide: 1 call for short docs, 2 calls for long ones
-    if total_chars <= 30000:
-        chunks = [full_text]
+    def write(self, index, text):
+        with self._lock:
+            if index == self._current:
+                self.callback(text)
+            else:
+                self._pending.setdefault(index, []).append(text)
+
+    def finish(self, index):
+        with self._lock:
+            self._finished.add(index)
+            while self._current in self._finished:
+                self._current += 1
+                self.callback('\n\n')
+                for text in self._pending.pop(self._current, []):
+                    self.callback(text)
+
+
+def _pte_user_prompt(chunk_text, part=None):
+    """User prompt for one methodology chunk; part ("2/5") is None for a single-call document."""
+    return _load_prompt('user_pte.txt').format(
+        part_info=f" (partea {part})" if part else "",
+        chunk_text=chunk_text
+    )
+
+
+def pte_requests(methodology_pages, model, max_tokens=PTE_MAX_TOKENS):
+    """(model, system, user_prompt, max_tokens) of every chunk generate_pte() would send for a page list.
+
+    model is the selected model; each request's model is the one route_model() picks for its chunk.
+    """
+    system = _cacheable_system(SYSTEM_PROMPT_PTE)
+    chunks = chunk_methodology(methodology_pages, max_tokens=max_tokens)
+    return [
+        (route_model('pte', model, chunk)[0], system,
+         _pte_user_prompt(chunk, None if len(chunks) == 1 else str(i + 1)), max_tokens)
+        for i, chunk in enumerate(chunks)
+    ]
+
+
+def generate_pte(methodology_pages, api_key, model, progress_callback=None,
+                 max_workers=PTE_MAX_WORKERS, use_cache=True, usage=None, on_text=None):
+    """Call Claude API to transform methodology into PTE format.
+
+    methodology_pages is either a list of page texts or a page iterator (see
+    iter_pdf_pages()), chunked by iter_chunks() so the first requests start
+    while the PDF is still being extracted. Both give the same chunks and
+    prompts (a chunk's prompt carries its number, never the total, which a
+    stream does not know yet), so they share response cache entries.
+    Each chunk's expected output fits max_tokens.
+    Chunks are streamed concurrently (up to max_workers at a time) and the
+    results are joined back in source order. With use_cache, chunks already
+    generated from identical input are taken from the local response cache.
+    Every finished chunk is also checkpointed until the whole run succeeds,
+    so rerunning a failed run (even without use_cache) only generates the
+    chunks that were not finished. Short or mostly mechanical chunks go to
+    the fast model (see route_model()).
+    on_text receives the output text in source order while it streams in
+    (e.g. DocxRenderer.feed).
+    """
+    client = api_client(api_key)
+
+    streaming = not isinstance(methodology_pages, (list, tuple))
+    if streaming:
+        chunks = iter_chunks(_count_pages(methodology_pages, progress_callback), max_tokens=PTE_MAX_TOKENS)
+        known_total = None
         if progress_callback:
-            progress_callback(f"Document scurt ({total_chars} caractere) - un singur apel API...")
+            progress_callback("Părțile se trimit către Claude API pe măsură ce textul este extras...")
     else:
-        mid = len(methodology_pages) // 2
-        chunks = [
-            '\n'.join(methodology_pages[:mid]),
-            '\n'.join(methodology_pages[mid:]),
-        ]
+        total_chars = sum(len(p) for p in methodology_pages)
+        chunks = list(iter_chunks(methodology_pages, max_tokens=PTE_MAX_TOKENS))
+        known_total = len(chunks)
         if progress_callback:
-            progress_callback(f"Document mare ({total_chars} caractere) - se trimite în 2 părți ({mid} + {len(methodology_pages) - mid} pagini)...")
+            if known_total == 1:
+                progress_callback(f"Document scurt ({total_chars} caractere) - un singur apel API...")
+            else:
+                sizes = ' + '.join(str(len(c)) for c, _ in chunks)
+                progress_callback(f"Document mare ({total_chars} caractere) - se trimite în {known_total} părți ({sizes} caractere)...")
 
-    all_results = []
-    total_input = 0
-    total_output = 0
-    num_chunks = len(chunks)
+    system = _cacheable_system(SYSTEM_PROMPT_PTE)
+    # Set once the first chunk's request has written the prompt cache
+    cache_ready = threading.Event()
+    ordered_text = _OrderedText(on_text) if on_text else None
 
-    for i, chunk_text in enumerate(chunks):
+    def _run_chunk(i, chunk_text, single_call):
         chunk_num = i + 1
-        chunk_label = f"[Partea {chunk_num}/{num_chunks}] " if num_chunks > 1 else ""
+        part = f"{chunk_num}/{known_total}" if known_total else f"{chunk_num}"
+        chunk_label = "" if single_call else f"[Partea {part}] "
         if progress_callback:
-            if num_chunks > 1:
-                progress_callback(f"Partea {chunk_num}/{num_chunks}: Se trimite către Claude API...")
-            else:
+            if single_call:
                 progress_callback("Se trimite către Claude API...")
+            else:
+                progress_callback(f"Partea {part}: Se trimite către Claude API ({len(chunk_text)} caractere)...")
 
-        part_info = f" (partea {chunk_num}/{num_chunks})" if num_chunks > 1 else ""
-        user_prompt = _load_prompt('user_pte.txt').format(
-            part_info=part_info,
-            chunk_text=chunk_text
-        )
+        user_prompt = _pte_user_prompt(chunk_text, None if single_call else str(chunk_num))
+        chunk_model, route_reason = route_model('pte', model, chunk_text)
+        if route_reason and progress_callback:
+            progress_callback(f"  {chunk_label}Model: {chunk_model} ({route_reason})")
 
-        result, inp_tok, out_tok = _stream_claude(
-            client, model, SYSTEM_PROMPT_PTE, user_prompt,
-            progress_callback=progress_callback,
-            chunk_label=chunk_label
-        )
-        all_results.append(result)
-        total_input += inp_tok
-        total_output += out_tok
+        checkpoint_key = _response_cache_key(chunk_model, system, user_prompt, PTE_MAX_TOKENS)
+        checkpoint_keys.append(checkpoint_key)
+        checkpoint = _pte_checkpoints.get(checkpoint_key)
+        try:
+            if checkpoint is not None:
+                if progress_callback:
+                    progress_callback(f"  {chunk_label}Reluat din rularea anterioară întreruptă")
+                if ordered_text:
+                    ordered_text.write(i, checkpoint['text'])
+                result = checkpoint['text'], checkpoint['input_tokens'], checkpoint['output_tokens']
+            else:
+                result = _stream_claude(
+                    client, chunk_model, system, user_prompt,
+                    progress_callback=progress_callback,
+                    chunk_label=chunk_label,
+                    max_tokens=PTE_MAX_TOKENS,
+                    use_cache=use_cache,
+                    on_start=cache_ready.set if i == 0 else None,
+                    usage=usage,
+                    on_text=ordered_text.writer(i) if ordered_text else None,
+                    baseline_model=model,
+                    # The chunks share the system prompt; on the selected model it is cached once
+                    baseline_warm=not single_call
+                )
+                _pte_checkpoints.put(checkpoint_key, {
+                    'text': result[0], 'input_tokens': result[1], 'output_tokens': result[2],
+                })
+        finally:
+            if i == 0:
+                cache_ready.set()
+        if ordered_text:
+            ordered_text.finish(i)
+        if progress_callback and not single_call:
+            progress_callback(f"Partea {part} finalizată")
+        return result
+
+    all_results = {}
+    checkpoint_keys = []
+    total_input = 0
+    total_output = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+            futures = {}
+            try:
+                for i, (chunk_text, last) in enumerate(chunks):
+                    # Once a chunk has failed, stop extracting the PDF and sending the rest
+                    for future in futures:
+                        if future.done() and future.exception() is not None:
+                            raise future.exception()
+                    if i == 0:
+                        # Below the model's minimum the system prompt is not cached at all
+                        warm_up = _prefix_cacheable(route_model('pte', model, chunk_text)[0], system)
+                    elif i == 1 and warm_up:
+                        # Let the first request write the system prompt to the cache,
+                        # so the other chunks read it instead of each writing it again
+                        cache_ready.wait(timeout=PROMPT_CACHE_WARMUP_TIMEOUT)
+                    futures[_submit(pool, _run_chunk, i, chunk_text, i == 0 and last)] = i
+                for future in as_completed(futures):
+                    result, inp_tok, out_tok = future.result()
+                    all_results[futures[future]] = result
+                    total_input += inp_tok
+                    total_output += out_tok
+            except BaseException:
+                # Don't start queued chunks once one of them has failed
+                for f in futures:
+                    f.cancel()
+                raise
+    except BaseException:
+        # Chunks still running when the failure came have finished by now
+        saved = sum(1 for key in checkpoint_keys if _pte_checkpoints.get(key) is not None)
+        if progress_callback and saved:
+            progress_callback(f"{saved} părți finalizate au fost salvate - "
+                              f"la o nouă rulare generarea continuă de la partea eșuată.")
+        raise
+
+    # The run is complete, its checkpoints are no longer needed
+    for key in checkpoint_keys:
+        _pte_checkpoints.delete(key)
 
     if progress_callback:
         progress_callback(
-            f"Generat cu succes! Total: {total_input} input tokeni, {total_output} output tokeni"
+            f"Generat cu succes! {len(all_results)} părți, total: {total_input} input tokeni, {total_output} output tokeni"
         )
 
-    return '\n\n'.join(all_results)
+    return '\n\n'.join(all_results[i] for i in range(len(all_results)))
+
+
+def _count_pages(pages, progress_callback=None):
+    """Pass pages through, reporting page and char counts once extraction ends."""
+    num_pages = 0
+    num_chars = 0
+    for page in pages:
+        num_pages += 1
+        num_chars += len(page)
+        yield page
+    if progress_callback:
+        progress_callback(f"  Extras {num_pages} pagini, {num_chars} caractere")
 
 
 def _load_reference_style():
@@ -151,47 +1707,150 @@ def _load_reference_style():
     return ''
 
 
-def generate_rezumat(notice_pages, datasheet_pages, atr_pages, company_data,
-                     api_key, model, progress_callback=None):
-    """Call Claude API to generate the Rezumat (Summary) section.
+# Rezumat sub-sections generated as separate concurrent calls: (number, prompt file, max_tokens).
+# The longest one goes first - its request writes the shared context to the prompt cache.
+REZUMAT_PARTS = (
+    ('1.3', 'user_rezumat_1_3.txt', 16384),
+    ('1.1', 'user_rezumat_1_1.txt', 4096),
+    ('1.2', 'user_rezumat_1_2.txt', 8192),
+)
+# Fixed sentences closing 1.3, filled from the company data without an API call
+REZUMAT_CLOSING = """#### 1.3.1. Garanția acordată lucrărilor
+Garanția acordată lucrărilor din cadrul prezentei oferte este de {warranty_months} de luni.
 
-    Single API call - output is ~5 pages, no chunking needed.
+#### 1.3.2. Experiența deținută de către managerul de proiect
+Experiența profesională specifică a managerului de proiect din cadrul prezentei oferte constă în peste {pm_experience} proiecte/contracte similare."""
+
+
+def rezumat_prompts(notice_pages, datasheet_pages, atr_pages, company_data, progress_callback=None,
+                    usage=None, prune=True, facts=None, parallel=True):
+    """Build the Rezumat requests: (system, [(number, user_prompt, max_tokens), ...]).
+
+    With parallel there is one request per REZUMAT_PARTS entry, sharing the
+    input documents through the cached system prompt; otherwise a single
+    request ('1') for the whole chapter. With prune, large input documents
+    are cut down to the passages relevant to the fields the prompts ask for.
+    facts (from extract_tender_facts) go into the prompt as a compact record,
+    and the fields it already answers are not searched for in the documents.
     """
-    client = anthropic.Anthropic(api_key=api_key)
+    template = _load_prompt('user_rezumat.txt')
+    part_templates = [_load_prompt(name) for _, name, _ in REZUMAT_PARTS] if parallel else []
+
+    facts_block = ""
+    queries = prompt_queries('\n'.join(part_templates) if parallel else template)
+    if facts:
+        known = {TENDER_FACT_FIELDS[k] for k, v in facts['fields'].items() if v}
+        queries = [q for q in queries if q.split(':')[0].strip() not in known]
+        facts_block = (
+            "\nDATE EXTRASE DIN DOCUMENTELE LICITAȚIEI (folosește-le ca atare; "
+            "caută în documente doar ce lipsește):\n" + format_tender_facts(facts) + "\n"
+        )
 
-    notice_text = '\n'.join(notice_pages)
-    datasheet_text = '\n'.join(datasheet_pages)
-    atr_text = '\n'.join(atr_pages)
+    documents = {'notice': notice_pages, 'datasheet': datasheet_pages, 'atr': atr_pages}
+    if prune:
+        # The facts record already holds what the opening passages are kept for
+        texts, before, after = prune_context(documents, queries, keep_openings=not facts)
+        if after < before:
+            if usage is not None:
+                usage.add(pruned_tokens=before - after)
+            if progress_callback:
+                progress_callback(
+                    f"Context redus la pasajele relevante: ~{before} -> ~{after} tokeni "
+                    f"(-{round(100 * (before - after) / before)}%)")
+    else:
+        texts = {name: '\n'.join(pages) for name, pages in documents.items()}
 
-    # Load reference style for tone/structure matching
+    # Load reference style for tone/structure matching. The example is a stable
+    # prefix shared by every run, so it goes into the cached system prompt and
+    # the user prompt only points to it.
     reference_style = _load_reference_style()
     reference_block = ""
+    reference_part = ""
     if reference_style:
-        reference_block = f"""
-
-EXEMPLU DE STIL (din documentul de referință - folosește EXACT acest stil, structură și nivel de detaliu, dar cu datele din proiectul curent):
-{reference_style}
+        reference_part = f"EXEMPLU DE STIL (din documentul de referință):\n{reference_style}"
+        reference_block = """
+Folosește EXACT stilul, structura și nivelul de detaliu din EXEMPLUL DE STIL din instrucțiunile de sistem, dar cu datele din proiectul curent.
 """
 
-    user_prompt = _load_prompt('user_rezumat.txt').format(
+    fields = dict(
         warranty_months=company_data['warranty_months'],
         pm_experience=company_data['pm_experience'],
         leader=company_data['leader'],
         associate=company_data['associate'],
         subcontractor=company_data['subcontractor'],
-        notice_text=notice_text,
-        datasheet_text=datasheet_text,
-        atr_text=atr_text,
+        notice_text=texts['notice'],
+        datasheet_text=texts['datasheet'],
+        atr_text=texts['atr'],
+        facts_block=facts_block,
         reference_block=reference_block
     )
 
+    if not parallel:
+        system = _cacheable_system(SYSTEM_PROMPT_REZUMAT, reference_part)
+        return system, [('1', template.format(**fields), 16384)]
+
+    # The documents are the same for every part: they go after the stable
+    # system prefix, inside the cached part, and each user prompt only asks for its part
+    system = _cacheable_system(SYSTEM_PROMPT_REZUMAT, reference_part,
+                               _load_prompt('context_rezumat.txt').format(**fields))
+    return system, [
+        (number, part_template.format(reference_block=reference_block), max_tokens)
+        for (number, _, max_tokens), part_template in zip(REZUMAT_PARTS, part_templates)
+    ]
+
+
+def _rezumat_frame(company_data):
+    """The parts of the chapter written locally: {position: text}, around the generated parts."""
+    return {0: "## 1. Rezumat", len(REZUMAT_PARTS) + 1: REZUMAT_CLOSING.format(**company_data)}
+
+
+def _rezumat_positions():
+    """Position of each generated part in the chapter (1.1 first, whatever the request order)."""
+    order = sorted((number for number, _, _ in REZUMAT_PARTS), key=lambda n: [int(x) for x in n.split('.')])
+    return {number: i + 1 for i, number in enumerate(order)}
+
+
+def rezumat_from_parts(part_texts, company_data):
+    """Join the generated parts ({number: text}) and the local parts into the chapter text."""
+    positions = _rezumat_positions()
+    parts = _rezumat_frame(company_data)
+    for number, text in part_texts.items():
+        parts[positions[number]] = text.strip()
+    return '\n\n'.join(parts[i] for i in sorted(parts))
+
+
+def generate_rezumat(notice_pages, datasheet_pages, atr_pages, company_data,
+                     api_key, model, progress_callback=None, use_cache=True, usage=None,
+                     on_text=None, prune=True, facts=None, parallel=True):
+    """Call Claude API to generate the Rezumat (Summary) section.
+
+    With parallel, 1.1, 1.2 and 1.3 are generated as concurrent calls that
+    share the input documents through the cached system prompt, 1.3.1 and
+    1.3.2 are filled in from company_data, and the parts are joined in order.
+    Otherwise the whole chapter comes from a single call. Parts whose
+    ROUTING rule is 'fast' go to the fast model (none by default). on_text receives
+    the output text in order while it streams in. prune and facts: see
+    rezumat_prompts().
+    """
+    client = api_client(api_key)
+    system, requests = rezumat_prompts(notice_pages, datasheet_pages, atr_pages, company_data,
+                                       progress_callback=progress_callback, usage=usage,
+                                       prune=prune, facts=facts, parallel=parallel)
+    if parallel:
+        return _generate_rezumat_parts(client, model, system, requests, company_data,
+                                       progress_callback, use_cache, usage, on_text)
+
+    _, user_prompt, max_tokens = requests[0]
     if progress_callback:
         progress_callback("Se trimite către Claude API...")
 
     result, inp_tok, out_tok = _stream_claude(
-        client, model, SYSTEM_PROMPT_REZUMAT, user_prompt,
+        client, model, system, user_prompt,
         progress_callback=progress_callback,
-        max_tokens=16384
+        max_tokens=max_tokens,
+        use_cache=use_cache,
+        usage=usage,
+        on_text=on_text
     )
 
     if progress_callback:
@@ -202,18 +1861,265 @@ EXEMPLU DE STIL (din documentul de referință - folosește EXACT acest stil, st
     return result
 
 
+def _generate_rezumat_parts(client, model, system, requests, company_data,
+                            progress_callback, use_cache, usage, on_text):
+    """Stream the part requests concurrently and join them with the local parts, in chapter order."""
+    positions = _rezumat_positions()
+    frame = _rezumat_frame(company_data)
+    ordered_text = _OrderedText(on_text) if on_text else None
+    if ordered_text:
+        for i, text in frame.items():
+            ordered_text.write(i, text)
+        ordered_text.finish(0)
+
+    if progress_callback:
+        progress_callback(f"Se trimit în paralel către Claude API subsecțiunile {', '.join(sorted(positions))} "
+                          f"(1.3.1 și 1.3.2 se completează din datele companiei)...")
+
+    # Set once the first request has written the shared context to the prompt cache
+    cache_ready = threading.Event()
+
+    def _run_part(index, number, user_prompt, max_tokens):
+        try:
+            part_model, route_reason = route_model(f'rezumat-{number}', model)
+            if route_reason and progress_callback:
+                progress_callback(f"  [{number}] Model: {part_model} ({route_reason})")
+            return _stream_claude(
+                client, part_model, system, user_prompt,
+                progress_callback=progress_callback,
+                chunk_label=f"[{number}] ",
+                max_tokens=max_tokens,
+                use_cache=use_cache,
+                on_start=cache_ready.set if index == 0 else None,
+                usage=usage,
+                on_text=ordered_text.writer(positions[number]) if ordered_text else None,
+                baseline_model=model,
+                baseline_warm=True
+            )
+        finally:
+            if index == 0:
+                cache_ready.set()
+            if ordered_text:
+                ordered_text.finish(positions[number])
+
+    part_texts = {}
+    total_input = total_output = 0
+    with ThreadPoolExecutor(max_workers=len(requests)) as pool:
+        futures = {}
+        try:
+            for index, (number, user_prompt, max_tokens) in enumerate(requests):
+                if index == 1 and _prefix_cacheable(route_model(f'rezumat-{requests[0][0]}', model)[0], system):
+                    cache_ready.wait(timeout=PROMPT_CACHE_WARMUP_TIMEOUT)
+                futures[_submit(pool, _run_part, index, number, user_prompt, max_tokens)] = number
+            for future in as_completed(futures):
+                text, inp_tok, out_tok = future.result()
+                part_texts[futures[future]] = text
+                total_input += inp_tok
+                total_output += out_tok
+        except BaseException:
+            for f in futures:
+                f.cancel()
+            raise
+
+    if progress_callback:
+        progress_callback(
+            f"Generat cu succes! {len(requests)} subsecțiuni, "
+            f"total: {total_input} input tokeni, {total_output} output tokeni"
+        )
+
+    return rezumat_from_parts(part_texts, company_data)
+
+
+# ---------------------------------------------------------------------------
+# TENDER FACTS
+# ---------------------------------------------------------------------------
+# Small, cheap model for pulling the fields the parsers cannot find
+FACTS_MODEL = ROUTING['fastModel']
+FACTS_MAX_TOKENS = 2048
+# Context sent to the model: only passages relevant to the missing fields
+FACTS_CONTEXT_TOKENS = 8000
+# Bump when the parsers change, to invalidate cached records
+_FACTS_VERSION = 1
+_facts_cache = DiskCache(os.path.join(CACHE_DIR, 'facts'))
+
+# key -> label; labels match the field names in user_rezumat.txt (1.1 Date generale)
+TENDER_FACT_FIELDS = {
+    'contract_title': "Titlu contract",
+    'credit_officer': "Ordonator principal de credite",
+    'authority_type': "Tipul autorității contractante",
+    'beneficiary': "Beneficiarul investiției",
+    'beneficiary_address': "Adresa beneficiar",
+    'beneficiary_contact': "Date de contact beneficiar",
+    'funding_source': "Sursa de finanțare",
+    'execution_site': "Locul principal de executare",
+    'contract_duration': "Durata Contractului",
+    'cpv_code': "Cod CPV",
+    'estimated_value': "Valoarea estimată",
+    'cadastral_number': "Număr cadastral (CAD)",
+    'installed_power': "Putere instalată",
+    'connection_voltage': "Nivel de tensiune racordare",
+}
+
+# key -> (input roles searched in order, pattern with the value in group 1)
+_FACT_PATTERNS = {
+    'cpv_code': (('notice', 'datasheet'), re.compile(r'\b(\d{8}-\d)\b')),
+    'contract_duration': (('datasheet', 'notice'), re.compile(
+        r'durat[aă]\s+(?:contractului|de\s+execu[tțţ]ie|(?:de\s+)?execu[tțţ]ie\s+a\s+lucr[aă]rilor)'
+        r'[^\n\d]{0,60}?(\d+\s*(?:\(\w+\)\s*)?(?:luni|zile|ani)\b)', re.IGNORECASE)),
+    'estimated_value': (('notice', 'datasheet'), re.compile(
+        r'valoare[a]?\s+(?:total[aă]\s+)?estimat[aă][^\d\n]{0,80}?'
+        r'(\d[\d.,\s]*\d\s*(?:lei|ron|euro|eur)\b(?:[\s,]*f[aă]r[aă]\s+tva)?)', re.IGNORECASE)),
+    'cadastral_number': (('datasheet', 'notice', 'atr'), re.compile(
+        r'\b(?:CAD|nr\.?\s*cadastral|num[aă]r(?:ul)?\s+cadastral)\s*(?:nr\.?)?\s*[:.]?\s*(\d{3,})',
+        re.IGNORECASE)),
+    'installed_power': (('atr', 'datasheet', 'notice'), re.compile(
+        r'(?:putere[a]?\s+(?:instalat[aă]|aprobat[aă]|total[aă]|maxim[aă])|capacitate[a]?)'
+        r'[^\d\n]{0,60}?(\d+(?:[.,]\d+)?\s*(?:MWp|MW|kWp|kW))\b', re.IGNORECASE)),
+    'connection_voltage': (('atr', 'datasheet', 'notice'), re.compile(
+        r'(?:tensiune[a]?|racord\w*)[^\n]{0,80}?\b(\d+(?:[.,]\d+)?\s*kV)\b', re.IGNORECASE)),
+}
+_EMAIL_RE = re.compile(r'[\w.+-]+@[\w-]+(?:\.[\w-]+)+')
+_PHONE_RE = re.compile(r'\b(tel(?:efon)?|fax)\s*[.:]?\s*(\+?\d[\d ./-]{6,}\d)', re.IGNORECASE)
+
+
+def _regex_facts(documents):
+    """Fields that deterministic parsers can read from the documents."""
+    facts = {}
+    for key, (roles, pattern) in _FACT_PATTERNS.items():
+        for role in roles:
+            if role not in documents:
+                continue
+            match = pattern.search(documents[role].text)
+            if match:
+                facts[key] = re.sub(r'\s+', ' ', match.group(1)).strip()
+                break
+
+    for role in ('notice', 'datasheet'):
+        if role not in documents:
+            continue
+        text = documents[role].text
+        contacts = list(dict.fromkeys(_EMAIL_RE.findall(text)))[:2]
+        contacts += list(dict.fromkeys(f"{kind.lower()} {number.strip()}"
+                                       for kind, number in _PHONE_RE.findall(text)))[:2]
+        if contacts:
+            facts['beneficiary_contact'] = ', '.join(contacts)
+            break
+    return facts
+
+
+def _parse_json_object(text):
+    """The JSON object in a model reply (tolerates code fences or text around it)."""
+    start, end = text.find('{'), text.rfind('}')
+    if start < 0 or end <= start:
+        raise ValueError("răspunsul nu conține un obiect JSON")
+    return json.loads(text[start:end + 1])
+
+
+def _facts_cache_key(documents, model):
+    payload = {
+        'version': _FACTS_VERSION,
+        'model': model,
+        'documents': {role: documents[role].key for role in ('notice', 'datasheet', 'atr') if role in documents},
+        'prompts': [_load_prompt('system_facts.txt'), _load_prompt('user_facts.txt')],
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def extract_tender_facts(documents, api_key, progress_callback=None, use_cache=True, usage=None,
+                         model=FACTS_MODEL):
+    """Structured record of the tender's key facts, cached per set of input files.
+
+    documents: the tender's DocumentStore (notice, datasheet, atr). Parsers fill
+    the mechanical fields (CPV, CAD, duration, value, contacts, power, voltage);
+    one small-model call fills the rest. Returns {'fields': {key: value or
+    None}, 'sources': {key: 'regex' | 'model'}}.
+    """
+    key = _facts_cache_key(documents, model)
+    cached = _facts_cache.get(key) if use_cache else None
+    if cached is not None:
+        if progress_callback:
+            progress_callback("  Date licitație: refolosite din cache")
+        return cached
+
+    fields = dict.fromkeys(TENDER_FACT_FIELDS)
+    fields.update(_regex_facts(documents))
+    sources = {k: 'regex' for k, v in fields.items() if v}
+
+    missing = [k for k, v in fields.items() if not v]
+    # False when the model's reply could not be read: the record is then not cached
+    complete = True
+    if missing:
+        queries = [TENDER_FACT_FIELDS[k] for k in missing]
+        texts, _, _ = prune_context(
+            {role: documents.pages(role) if role in documents else [] for role in ('notice', 'datasheet', 'atr')},
+            queries, max_tokens=FACTS_CONTEXT_TOKENS)
+        user_prompt = _load_prompt('user_facts.txt').format(
+            fields='\n'.join(f"- {k}: {TENDER_FACT_FIELDS[k]}" for k in missing),
+            keys=', '.join(missing),
+            notice_text=texts['notice'],
+            datasheet_text=texts['datasheet'],
+            atr_text=texts['atr'],
+        )
+        system = _cacheable_system(_load_prompt('system_facts.txt'))
+        reply, _, _ = _stream_claude(
+            api_client(api_key), model, system, user_prompt,
+            max_tokens=FACTS_MAX_TOKENS, use_cache=use_cache, usage=usage,
+        )
+        try:
+            extracted = _parse_json_object(reply)
+        except ValueError as e:
+            extracted = {}
+            complete = False
+            # Neither the reply nor the record built without it may be reused by the next run
+            _response_cache.delete(_response_cache_key(model, system, user_prompt, FACTS_MAX_TOKENS))
+            if progress_callback:
+                progress_callback(f"  Atenție: răspuns invalid la extragerea datelor ({e})")
+        for k in missing:
+            value = extracted.get(k)
+            if value not in (None, ''):
+                fields[k] = str(value).strip()
+                sources[k] = 'model'
+
+    facts = {'fields': fields, 'sources': sources}
+    if complete:
+        _facts_cache.put(key, facts)
+    if progress_callback:
+        from_regex = sum(1 for s in sources.values() if s == 'regex')
+        progress_callback(f"  Date licitație: {len(sources)}/{len(fields)} câmpuri "
+                          f"({from_regex} din reguli, {len(sources) - from_regex} prin {model})")
+    return facts
+
+
+def format_tender_facts(facts):
+    """Compact "- Label: value" lines of the known fields, for prompts."""
+    return '\n'.join(f"- {TENDER_FACT_FIELDS[k]}: {v}" for k, v in facts['fields'].items() if v)
+
+
 # ---------------------------------------------------------------------------
 # DOCX BUILDER
 # ---------------------------------------------------------------------------
-def build_docx(pte_text, output_path, doc_type="pte"):
-    """Build a DOCX document from generated text.
+FONT_NAME = 'Arial Narrow'
+# Heading sizes by level; body text is 12pt and table text 11pt
+HEADING_SIZES = {1: 16, 2: 14, 3: 12}
+TABLE_TEXT_STYLE = 'Table Text'
+TABLE_STYLE = 'Light Grid Accent 1'
 
-    Args:
-        doc_type: "pte" = flat list with single title (no headings),
-                  "generic" = full heading support for future doc types.
-    """
-    doc = Document()
+# Empty document with page setup and styles, built once and copied for every DOCX
+_base_document = None
+_base_document_lock = threading.Lock()
 
+
+def _set_style_font(style, size):
+    """Set a style's font by name, dropping theme fonts that would override it."""
+    style.font.name = FONT_NAME
+    style.font.size = Pt(size)
+    r_fonts = style.element.rPr.rFonts
+    for attr in ('w:asciiTheme', 'w:hAnsiTheme', 'w:eastAsiaTheme', 'w:cstheme'):
+        r_fonts.attrib.pop(qn(attr), None)
+
+
+def _setup_document(doc):
+    """Page setup and named styles. Text is formatted by style reference, not per run."""
     # Page setup - A4
     section = doc.sections[0]
     section.page_width = Cm(21)
@@ -225,121 +2131,648 @@ def build_docx(pte_text, output_path, doc_type="pte"):
 
     # Default font
     style = doc.styles['Normal']
-    style.font.name = 'Arial Narrow'
-    style.font.size = Pt(12)
+    _set_style_font(style, 12)
     style.paragraph_format.space_after = Pt(6)
     style.paragraph_format.line_spacing = 1.15
 
-    # PTE mode: add the single title at the top
-    if doc_type == "pte":
-        h = doc.add_heading("Proceduri tehnice de execuție în cadrul prezentului Contract", level=2)
-        for run in h.runs:
-            run.font.name = 'Arial Narrow'
-            run.font.size = Pt(14)
+    for level, size in HEADING_SIZES.items():
+        _set_style_font(doc.styles[f'Heading {level}'], size)
 
-    # Parse markdown-like output
-    lines = pte_text.split('\n')
-    i = 0
+    table_style = doc.styles.add_style(TABLE_TEXT_STYLE, WD_STYLE_TYPE.PARAGRAPH)
+    table_style.base_style = doc.styles['Normal']
+    table_style.font.size = Pt(11)
 
-    while i < len(lines):
-        line = lines[i].rstrip()
 
-        if not line.strip():
-            i += 1
-            continue
+def _new_document():
+    """A new Document with the shared page setup and styles already applied."""
+    global _base_document
+    with _base_document_lock:
+        if _base_document is None:
+            doc = Document()
+            _setup_document(doc)
+            buffer = io.BytesIO()
+            doc.save(buffer)
+            _base_document = buffer.getvalue()
+    return Document(io.BytesIO(_base_document))
+
+
+def _document_styles(doc):
+    """Style objects used by the builder, looked up by name once per document."""
+    names = [f'Heading {level}' for level in HEADING_SIZES] + ['List Bullet', TABLE_TEXT_STYLE, TABLE_STYLE]
+    return {name: doc.styles[name] for name in names}
+
+
+class DocxRenderer:
+    """Renders generated markdown-like text into a DOCX as it arrives.
+
+    feed() accepts arbitrary text fragments (e.g. API stream deltas); every
+    completed line is turned into a heading, bullet, paragraph or table row
+    right away, so the document is ready as soon as the stream ends.
+
+    doc_type: "pte" = flat list with single title (no headings),
+              "generic" = full heading support for future doc types.
+    doc: render into this existing document (e.g. one section of a full
+         proposal) instead of a new one; the PTE title is then left to the caller.
+    heading_offset: levels added to every markdown heading (capped at 3).
+    """
+
+    def __init__(self, doc_type="pte", doc=None, heading_offset=0):
+        self.doc_type = doc_type
+        self.heading_offset = heading_offset
+        self.doc = doc if doc is not None else _new_document()
+        self.styles = _document_styles(self.doc)
+        self._partial = ''
+        self._table_rows = []
+
+        # PTE mode: add the single title at the top
+        if doc_type == "pte" and doc is None:
+            self.doc.add_paragraph("Proceduri tehnice de execuție în cadrul prezentului Contract",
+                                   style=self.styles['Heading 2'])
+
+    def feed(self, text):
+        """Add a fragment of generated text; renders every line it completes."""
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self.add_line(line)
+
+    def add_line(self, line):
+        line = line.rstrip()
+        stripped = line.strip()
+
+        # Table detection: consecutive lines starting with |
+        if stripped.startswith('|') and self.doc_type != "pte":
+            self._table_rows.append(stripped)
+            return
+        self._flush_table()
+
+        if not stripped:
+            return
 
         # Skip headings in PTE mode (safety net)
         if line.startswith('#'):
-            if doc_type == "pte":
-                i += 1
-                continue  # Skip all headings for PTE
+            if self.doc_type == "pte":
+                return
             # Generic mode: render headings
             if line.startswith('#### '):
-                heading_text = line[5:].strip()
-                h = doc.add_heading(heading_text, level=3)
-                for run in h.runs:
-                    run.font.name = 'Arial Narrow'
-                    run.font.size = Pt(12)
+                self.add_heading(line[5:].strip(), 3)
             elif line.startswith('### '):
-                heading_text = line[4:].strip()
-                h = doc.add_heading(heading_text, level=2)
-                for run in h.runs:
-                    run.font.name = 'Arial Narrow'
-                    run.font.size = Pt(14)
+                self.add_heading(line[4:].strip(), 2)
             elif line.startswith('## '):
-                heading_text = line[3:].strip()
-                h = doc.add_heading(heading_text, level=1)
-                for run in h.runs:
-                    run.font.name = 'Arial Narrow'
-                    run.font.size = Pt(16)
-            i += 1
-            continue
-
-        # Table detection: consecutive lines starting with |
-        if line.strip().startswith('|') and doc_type != "pte":
-            table_rows = []
-            while i < len(lines) and lines[i].strip().startswith('|'):
-                table_rows.append(lines[i].strip())
-                i += 1
-            if table_rows:
-                _add_table(doc, table_rows)
-            continue
+                self.add_heading(line[3:].strip(), 1)
+            return
 
-        if line.strip().startswith('- ') or line.strip().startswith('• '):
+        if stripped.startswith('- ') or stripped.startswith('• '):
             # Bullet point
-            bullet_text = line.strip()[2:].strip()
-            p = doc.add_paragraph(style='List Bullet')
-            _add_formatted_text(p, bullet_text)
-
+            p = self.doc.add_paragraph(style=self.styles['List Bullet'])
+            _add_formatted_text(p, stripped[2:].strip())
         else:
             # Regular paragraph - handle **bold** markers
-            p = doc.add_paragraph()
-            _add_formatted_text(p, line.strip())
+            p = self.doc.add_paragraph()
+            _add_formatted_text(p, stripped)
+
+    def add_heading(self, text, level):
+        level = min(level + self.heading_offset, max(HEADING_SIZES))
+        self.doc.add_paragraph(text, style=self.styles[f'Heading {level}'])
+
+    def _flush_table(self):
+        if self._table_rows:
+            _add_table(self.doc, self._table_rows, self.styles)
+            self._table_rows = []
+
+    def finish(self):
+        """Render the last (unterminated) line and any open table."""
+        if self._partial:
+            self.add_line(self._partial)
+            self._partial = ''
+        self._flush_table()
 
-        i += 1
+    def save(self, output_path):
+        self.finish()
+        self.doc.save(output_path)
+
+
+def build_docx(pte_text, output_path, doc_type="pte"):
+    """Build a DOCX document from generated text.
 
-    doc.save(output_path)
+    Args:
+        doc_type: "pte" = flat list with single title (no headings),
+                  "generic" = full heading support for future doc types.
+    """
+    renderer = DocxRenderer(doc_type)
+    renderer.feed(pte_text)
+    renderer.save(output_path)
 
 
 def _add_formatted_text(paragraph, text):
-    """Parse **bold** markers and add formatted runs to paragraph."""
+    """Parse **bold** markers and add runs to paragraph (font comes from the style)."""
     parts = text.split('**')
     for i, part in enumerate(parts):
         if not part:
             continue
         run = paragraph.add_run(part)
-        run.font.name = 'Arial Narrow'
-        run.font.size = Pt(12)
         if i % 2 == 1:  # Odd indices are bold
             run.bold = True
 
 
-def _add_table(doc, rows):
-    """Add a table to the document from pipe-separated markdown rows."""
-    parsed_rows = []
+# Cell separators: pipes not escaped as \|
+_CELL_SPLIT_RE = re.compile(r'(?<!\\)\|')
+_SEPARATOR_CELL_RE = re.compile(r'^:?-*:?$')
+# Characters XML 1.0 does not allow in text
+_XML_INVALID_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+
+
+def _parse_table_rows(rows):
+    """Split markdown table rows into cell lists, dropping |---|---| separator rows."""
+    data_rows = []
     for row in rows:
-        cells = [c.strip() for c in row.strip('|').split('|')]
-        parsed_rows.append(cells)
+        row = row.strip()
+        if row.startswith('|'):
+            row = row[1:]
+        if row.endswith('|') and not row.endswith('\\|'):
+            row = row[:-1]
+        cells = [c.strip().replace('\\|', '|') for c in _CELL_SPLIT_RE.split(row)]
+        if all(_SEPARATOR_CELL_RE.match(c.replace(' ', '')) for c in cells):
+            continue
+        data_rows.append(cells)
+    return data_rows
+
 
-    # Skip separator rows (like |---|---|)
-    data_rows = [r for r in parsed_rows if not all(set(c) <= {'-', ' ', ':'} for c in r)]
+def _add_table(doc, rows, styles=None):
+    """Add a table to the document from pipe-separated markdown rows.
 
+    The row and cell XML for the whole table is generated as one string and
+    parsed once, instead of resolving table.cell(i, j) per cell (which walks
+    the table XML every time and makes big tables quadratic). Short rows are
+    padded with empty cells.
+    """
+    styles = styles or _document_styles(doc)
+    data_rows = _parse_table_rows(rows)
     if not data_rows:
         return
 
     num_cols = max(len(r) for r in data_rows)
-    table = doc.add_table(rows=len(data_rows), cols=num_cols)
-    table.style = 'Light Grid Accent 1'
+    table = doc.add_table(rows=0, cols=num_cols)
+    table.style = styles[TABLE_STYLE]
+
+    col_width = table._tbl.tblGrid.gridCol_lst[0].w.twips
+    cell_start = (
+        f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{col_width}"/></w:tcPr>'
+        f'<w:p><w:pPr><w:pStyle w:val="{styles[TABLE_TEXT_STYLE].style_id}"/></w:pPr>'
+    )
+    parts = [f'<w:tbl {nsdecls("w")}>']
+    for row_data in data_rows:
+        parts.append('<w:tr>')
+        for j in range(num_cols):
+            cell_text = _XML_INVALID_RE.sub('', row_data[j]) if j < len(row_data) else ''
+            parts.append(cell_start)
+            if cell_text:
+                parts.append(f'<w:r><w:t xml:space="preserve">{xml_escape(cell_text)}</w:t></w:r>')
+            parts.append('</w:p></w:tc>')
+        parts.append('</w:tr>')
+    parts.append('</w:tbl>')
+
+    table._tbl.extend(parse_xml(''.join(parts)).tr_lst)
+
+
+# ---------------------------------------------------------------------------
+# PIPELINES (shared by the GUI and the headless entry points)
+# ---------------------------------------------------------------------------
+DEFAULT_MODEL = 'claude-sonnet-4-20250514'
+MODELS = ['claude-haiku-4-5-20251001', 'claude-sonnet-4-20250514', 'claude-opus-4-20250514']
+
+DEFAULT_COMPANY_DATA = {
+    'leader': 'CRC AG S.R.L.',
+    'associate': 'CRC NEW ENERGY S.R.L.',
+    'subcontractor': 'BACKUP TECHNOLOGY S.R.L.',
+    'warranty_months': 120,
+    'pm_experience': 5,
+}
+
+
+def _save_outputs(text, output_path, renderer, progress_callback=None):
+    """Save the raw generated text next to the DOCX, then save the DOCX.
+
+    The DOCX was rendered by renderer while the text was streaming in, so this
+    only writes it out.
+    """
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+
+    raw_path = os.path.splitext(output_path)[0] + '_raw.txt'
+    with open(raw_path, 'w', encoding='utf-8') as f:
+        f.write(text)
+    if progress_callback:
+        progress_callback(f"  Text brut salvat: {raw_path}")
+
+    if progress_callback:
+        progress_callback("Pas 3/3: Se salvează documentul DOCX...")
+    renderer.save(output_path)
+    if progress_callback:
+        progress_callback(f"  Document salvat: {output_path}")
+    return raw_path
+
+
+def run_pte(methodology_path, output_path, api_key, model, progress_callback=None,
+            use_cache=True):
+    """Full PTE run: extract the methodology PDF, generate, write raw text + DOCX.
+
+    Returns a summary dict with output paths, elapsed seconds and token usage.
+    """
+    started = time.monotonic()
+    usage = TokenUsage()
+
+    # Steps 1+2: Extract PDF text and generate PTE via Claude. Pages are
+    # streamed into the chunker, so the first chunk is sent while the rest
+    # of the PDF is still being extracted.
+    if progress_callback:
+        progress_callback("Pas 1-2/3: Se extrage textul din PDF și se generează PTE prin Claude API...")
+        progress_callback(f"  Model: {model}")
+    pages = iter_normalized_pages(iter_pdf_pages(methodology_path), progress_callback)
+    renderer = DocxRenderer("pte")
+
+    pte_text = generate_pte(
+        pages,
+        api_key=api_key,
+        model=model,
+        progress_callback=progress_callback,
+        use_cache=use_cache,
+        usage=usage,
+        on_text=renderer.feed
+    )
+
+    raw_path = _save_outputs(pte_text, output_path, renderer, progress_callback)
+    _report_cost(usage, progress_callback)
+    return {
+        'output_path': output_path,
+        'raw_path': raw_path,
+        'seconds': round(time.monotonic() - started, 2),
+        'usage': usage.as_dict(),
+    }
+
+
+def run_rezumat(notice_path, datasheet_path, atr_path, output_path, company_data,
+                api_key, model, progress_callback=None, use_cache=True, documents=None):
+    """Full Rezumat run: extract the 3 PDFs, generate, write raw text + DOCX.
+
+    documents: a DocumentStore of the tender to reuse PDFs already extracted
+    for other sections (one is created from the three paths if not given).
+    Returns a summary dict with output paths, elapsed seconds and token usage.
+    """
+    started = time.monotonic()
+    usage = TokenUsage()
+    if documents is None:
+        documents = DocumentStore({'notice': notice_path, 'datasheet': datasheet_path, 'atr': atr_path})
+
+    # Step 1: Extract text from all 3 PDFs
+    if progress_callback:
+        progress_callback("Pas 1/3: Se extrage textul din PDF-uri...")
+    extracted = []
+    for label, role in (("Anunț", 'notice'), ("Fișa de date", 'datasheet'), ("ATR", 'atr')):
+        document = documents[role]
+        if progress_callback:
+            progress_callback(f"  {label}: {document.name}")
+        pages = document.pages
+        if progress_callback:
+            stats = document.normalization
+            progress_callback(f"    {len(pages)} pagini, {stats['chars_after']} caractere "
+                              f"({stats['chars_before']} înainte de normalizare)")
+        extracted.append(pages)
+    notice_pages, datasheet_pages, atr_pages = extracted
+    facts = extract_tender_facts(documents, api_key, progress_callback=progress_callback,
+                                 use_cache=use_cache, usage=usage)
+
+    # Step 2: Generate Rezumat via Claude
+    if progress_callback:
+        progress_callback("Pas 2/3: Se generează Rezumatul prin Claude API...")
+        progress_callback(f"  Model: {model}")
+
+    renderer = DocxRenderer("generic")
+    rezumat_text = generate_rezumat(
+        notice_pages, datasheet_pages, atr_pages, company_data,
+        api_key=api_key,
+        model=model,
+        progress_callback=progress_callback,
+        use_cache=use_cache,
+        usage=usage,
+        on_text=renderer.feed,
+        facts=facts
+    )
+
+    raw_path = _save_outputs(rezumat_text, output_path, renderer, progress_callback)
+    _report_cost(usage, progress_callback)
+    return {
+        'output_path': output_path,
+        'raw_path': raw_path,
+        'seconds': round(time.monotonic() - started, 2),
+        'usage': usage.as_dict(),
+    }
+
+
+# ---------------------------------------------------------------------------
+# SECTION REGISTRY & SCHEDULER
+# ---------------------------------------------------------------------------
+SECTION_MAX_WORKERS = 3
+SECTION_CACHE_MAX_ENTRIES = 500
+_section_cache = DiskCache(os.path.join(CACHE_DIR, 'sections'), max_entries=SECTION_CACHE_MAX_ENTRIES)
+
+# Input PDF roles a section can declare, with their labels in the GUI
+INPUT_LABELS = {
+    'methodology': "Metodologia de execuție",
+    'notice': "Anunț de participare",
+    'datasheet': "Fișa de date",
+    'atr': "ATR (Aviz Tehnic Racordare)",
+}
+
+
+class Section:
+    """One proposal section: its inputs, prompts, upstream sections and generator.
+
+    generate(documents, upstream, ctx) returns the section text; documents is
+    the tender's DocumentStore, upstream maps each depends_on section id to its
+    text and ctx holds api_key, model, company_data, progress_callback,
+    use_cache, usage.
+    A section registered without generate is shown as planned ("în curând").
+    page names a dedicated GUI page; other sections get the generic SectionPage.
+    uses_reference_style and uses_facts mark sections whose text also depends
+    on s01_context.json and on the tender facts record (see _section_fingerprint).
+    """
+
+    def __init__(self, id, number, title, description, inputs=(), prompts=(), depends_on=(),
+                 generate=None, doc_type="generic", uses_company_data=False, page=None, menu_title=None,
+                 uses_reference_style=False, uses_facts=False):
+        self.id = id
+        self.number = number
+        self.title = title
+        self.menu_title = menu_title or title
+        self.description = description
+        self.inputs = tuple(inputs)
+        self.prompts = tuple(prompts)
+        self.depends_on = tuple(depends_on)
+        self.generate = generate
+        self.doc_type = doc_type
+        self.uses_company_data = uses_company_data
+        self.uses_reference_style = uses_reference_style
+        self.uses_facts = uses_facts
+        self.page = page
+
+    @property
+    def planned(self):
+        return self.generate is None
+
+    @property
+    def level(self):
+        """Heading level from the section number: "1" -> 1, "3.5.2" -> 3."""
+        return min(max(HEADING_SIZES), self.number.count('.') + 1)
+
+    @property
+    def heading(self):
+        return f"{self.number}. {self.title}" if '.' not in self.number else f"{self.number} {self.title}"
+
+    @property
+    def sort_key(self):
+        return tuple(int(part) for part in self.number.split('.'))
+
+
+SECTIONS = {}
+
+
+def register_section(section):
+    """Add a section to the registry; returns it."""
+    if section.id in SECTIONS:
+        raise ValueError(f"Secțiune înregistrată de două ori: {section.id}")
+    unknown = [role for role in section.inputs if role not in INPUT_LABELS]
+    if unknown:
+        raise ValueError(f"Secțiunea {section.id}: intrări necunoscute {', '.join(unknown)}")
+    SECTIONS[section.id] = section
+    return section
+
+
+def proposal_sections():
+    """All registered sections, in proposal order."""
+    return sorted(SECTIONS.values(), key=lambda s: s.sort_key)
+
+
+def _section_order(targets):
+    """Targets plus everything upstream of them, dependencies first."""
+    order = []
+    state = {}
+
+    def visit(section_id, path):
+        if state.get(section_id) == 'done':
+            return
+        if state.get(section_id) == 'visiting':
+            raise ValueError(f"Dependență circulară între secțiuni: {' -> '.join(path + [section_id])}")
+        if section_id not in SECTIONS:
+            raise ValueError(f"Secțiune necunoscută: {section_id}")
+        state[section_id] = 'visiting'
+        for dep in SECTIONS[section_id].depends_on:
+            visit(dep, path + [section_id])
+        state[section_id] = 'done'
+        order.append(SECTIONS[section_id])
+
+    for section_id in targets:
+        visit(section_id, [])
+    return order
+
+
+def _section_fingerprint(section, documents, model, company_data, upstream_keys):
+    """Hash of everything the section's text depends on, upstream sections included."""
+    prompts = {}
+    for name in section.prompts:
+        with open(os.path.join(PROMPTS_DIR, name), 'r', encoding='utf-8') as f:
+            prompts[name] = f.read()
+    payload = {
+        'section': section.id,
+        'model': model,
+        'inputs': {role: documents[role].key for role in section.inputs},
+        'prompts': prompts,
+        'company_data': company_data if section.uses_company_data else None,
+        'reference_style': _load_reference_style() if section.uses_reference_style else None,
+        'facts_version': _FACTS_VERSION if section.uses_facts else None,
+        'upstream': upstream_keys,
+        'routing': ROUTING,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode('utf-8')).hexdigest()
+
+
+def runnable_sections(inputs):
+    """Ids of the implemented sections that can run with the given inputs, in proposal order."""
+    runnable = set()
+    for section in sorted(SECTIONS.values(), key=lambda s: len(_section_order([s.id]))):
+        if (not section.planned and all(inputs.get(role) for role in section.inputs)
+                and all(dep in runnable for dep in section.depends_on)):
+            runnable.add(section.id)
+    return [s.id for s in proposal_sections() if s.id in runnable]
+
+
+def run_sections(targets, inputs, api_key, model, company_data, progress_callback=None,
+                 use_cache=True, usage=None, max_workers=SECTION_MAX_WORKERS, documents=None):
+    """Generate the target sections and their upstream sections.
+
+    inputs maps input roles to PDF paths; all sections read them through one
+    DocumentStore (documents, created here if not given), so every PDF is
+    extracted once per run.
+
+    Sections run as soon as their upstream sections are done, independent ones
+    in parallel. A section whose fingerprint (inputs, prompts, model, company
+    data, reference style, facts version, upstream fingerprints) is in the
+    section cache is not regenerated.
+    Returns (texts, sources): section id -> text, and -> 'cache' / 'generated'.
+    """
+    order = _section_order(targets)
+    for section in order:
+        if section.planned:
+            raise ValueError(f"Secțiunea {section.heading} nu este încă implementată")
+        missing = [INPUT_LABELS[role] for role in section.inputs if not inputs.get(role)]
+        if missing:
+            raise FileNotFoundError(f"{section.heading}: fișiere de intrare lipsă: {', '.join(missing)}")
+
+    usage = usage if usage is not None else TokenUsage()
+    documents = documents if documents is not None else DocumentStore(inputs)
+    keys = {}
+    texts = {}
+    sources = {}
+
+    def _run(section):
+        def progress(message):
+            if progress_callback:
+                progress_callback(f"[{section.number}] {message.strip()}")
+
+        ctx = {
+            'api_key': api_key, 'model': model, 'company_data': company_data,
+            'progress_callback': progress, 'use_cache': use_cache, 'usage': usage,
+        }
+        return section.generate(documents, {dep: texts[dep] for dep in section.depends_on}, ctx)
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        running = {}
+        waiting = list(order)
+        while waiting or running:
+            # Start (or take from cache) every section whose upstream is done
+            for section in list(waiting):
+                if not all(dep in texts for dep in section.depends_on):
+                    continue
+                waiting.remove(section)
+                keys[section.id] = _section_fingerprint(
+                    section, documents, model, company_data,
+                    [keys[dep] for dep in section.depends_on])
+                cached = _section_cache.get(keys[section.id]) if use_cache else None
+                if cached is not None:
+                    texts[section.id] = cached['text']
+                    sources[section.id] = 'cache'
+                    if progress_callback:
+                        progress_callback(f"[{section.number}] Secțiune neschimbată, refolosită din cache")
+                else:
+                    running[_submit(pool, _run, section)] = section
+
+            if not running:
+                continue
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                section = running.pop(future)
+                texts[section.id] = future.result()
+                sources[section.id] = 'generated'
+                _section_cache.put(keys[section.id], {'text': texts[section.id]})
+
+    return texts, sources
+
+
+def _generate_rezumat_section(documents, upstream, ctx):
+    facts = extract_tender_facts(documents, ctx['api_key'], progress_callback=ctx['progress_callback'],
+                                 use_cache=ctx['use_cache'], usage=ctx['usage'])
+    return generate_rezumat(
+        documents.pages('notice'),
+        documents.pages('datasheet'),
+        documents.pages('atr'),
+        ctx['company_data'],
+        api_key=ctx['api_key'], model=ctx['model'],
+        progress_callback=ctx['progress_callback'],
+        use_cache=ctx['use_cache'], usage=ctx['usage'],
+        facts=facts,
+    )
+
+
+def _generate_pte_section(documents, upstream, ctx):
+    return generate_pte(
+        documents.pages('methodology'),
+        api_key=ctx['api_key'], model=ctx['model'],
+        progress_callback=ctx['progress_callback'],
+        use_cache=ctx['use_cache'], usage=ctx['usage'],
+    )
+
+
+register_section(Section(
+    'rezumat', '1', "Rezumat",
+    "Date generale, obiectul contractului, avantaje competitive",
+    inputs=('notice', 'datasheet', 'atr'),
+    prompts=('system_rezumat.txt', 'user_rezumat.txt', 'context_rezumat.txt',
+             'user_rezumat_1_1.txt', 'user_rezumat_1_2.txt', 'user_rezumat_1_3.txt',
+             'system_facts.txt', 'user_facts.txt'),
+    generate=_generate_rezumat_section,
+    uses_company_data=True,
+    uses_reference_style=True,
+    uses_facts=True,
+    page='rezumat',
+))
+register_section(Section(
+    'metodologie', '2', "Metodologia de executare",
+    "Descrierea lucrărilor și echipamentelor necesare",
+    inputs=('methodology',),
+))
+register_section(Section(
+    'pte', '3.5.2', "Proceduri tehnice de execuție în cadrul prezentului Contract",
+    "Proceduri Tehnice de Execuție - generare din Metodologia de Execuție",
+    menu_title="Generator PTE",
+    inputs=('methodology',),
+    prompts=('system_pte.txt', 'user_pte.txt'),
+    generate=_generate_pte_section,
+    doc_type="pte",
+    page='pte',
+))
+register_section(Section(
+    'control', '3.6', "Puncte de control calitate",
+    "Verificări și teste pe faze de execuție",
+    inputs=('methodology',),
+    depends_on=('pte',),
+))
+register_section(Section(
+    'personal', '5', "Personal propus",
+    "Echipa de proiect și responsabilități",
+    inputs=('datasheet',),
+    depends_on=('rezumat',),
+    uses_company_data=True,
+))
+
+
+def run_section(section_id, inputs, output_path, company_data, api_key, model,
+                progress_callback=None, use_cache=True, documents=None):
+    """Generate one registered section (and whatever it depends on) into its own DOCX.
+
+    Returns a summary dict with output paths, elapsed seconds and token usage.
+    """
+    started = time.monotonic()
+    usage = TokenUsage()
+    section = SECTIONS[section_id]
+    if progress_callback:
+        progress_callback(f"Se generează {section.heading}...")
+        progress_callback(f"  Model: {model}")
+
+    texts, _ = run_sections([section_id], inputs, api_key, model, company_data,
+                            progress_callback=progress_callback, use_cache=use_cache, usage=usage,
+                            documents=documents)
 
-    for i, row_data in enumerate(data_rows):
-        for j, cell_text in enumerate(row_data):
-            if j < num_cols:
-                cell = table.cell(i, j)
-                cell.text = cell_text
-                for paragraph in cell.paragraphs:
-                    for run in paragraph.runs:
-                        run.font.name = 'Arial Narrow'
-                        run.font.size = Pt(11)
+    renderer = DocxRenderer(section.doc_type)
+    renderer.feed(texts[section_id])
+    raw_path = _save_outputs(texts[section_id], output_path, renderer, progress_callback)
+    _report_cost(usage, progress_callback)
+    return {
+        'output_path': output_path,
+        'raw_path': raw_path,
+        'seconds': round(time.monotonic() - started, 2),
+        'usage': usage.as_dict(),
+    }
 
 
 # ---------------------------------------------------------------------------
@@ -356,14 +2789,15 @@ class App:
 
         # Shared state
         self.api_key = tk.StringVar(value=anthropic_api_key)
-        self.model = tk.StringVar(value='claude-sonnet-4-20250514')
+        self.model = tk.StringVar(value=DEFAULT_MODEL)
+        self.use_response_cache = tk.BooleanVar(value=True)
 
         # Company data (shared across sections)
-        self.company_leader = tk.StringVar(value='CRC AG S.R.L.')
-        self.company_associate = tk.StringVar(value='CRC NEW ENERGY S.R.L.')
-        self.company_subcontractor = tk.StringVar(value='BACKUP TECHNOLOGY S.R.L.')
-        self.warranty_months = tk.IntVar(value=120)
-        self.pm_experience = tk.IntVar(value=5)
+        self.company_leader = tk.StringVar(value=DEFAULT_COMPANY_DATA['leader'])
+        self.company_associate = tk.StringVar(value=DEFAULT_COMPANY_DATA['associate'])
+        self.company_subcontractor = tk.StringVar(value=DEFAULT_COMPANY_DATA['subcontractor'])
+        self.warranty_months = tk.IntVar(value=DEFAULT_COMPANY_DATA['warranty_months'])
+        self.pm_experience = tk.IntVar(value=DEFAULT_COMPANY_DATA['pm_experience'])
 
         # Container for pages
         self.container = ttk.Frame(self.root)
@@ -376,14 +2810,27 @@ class App:
 
     def _create_pages(self):
         """Create all pages (frames) and store them."""
-        for PageClass in (HomePage, PTEPage, RezumatPage):
-            page = PageClass(self.container, self)
+        pages = [HomePage(self.container, self), PTEPage(self.container, self), RezumatPage(self.container, self)]
+        # Registered sections without a dedicated page get the generic one
+        pages += [SectionPage(self.container, self, section) for section in proposal_sections()
+                  if not section.planned and section.page is None]
+        for page in pages:
             self.pages[page.name] = page
             page.frame.grid(row=0, column=0, sticky="nsew")
 
         self.container.grid_rowconfigure(0, weight=1)
         self.container.grid_columnconfigure(0, weight=1)
 
+    def company_data(self):
+        """Current company data from the home page fields."""
+        return {
+            'leader': self.company_leader.get(),
+            'associate': self.company_associate.get(),
+            'subcontractor': self.company_subcontractor.get(),
+            'warranty_months': self.warranty_months.get(),
+            'pm_experience': self.pm_experience.get(),
+        }
+
     def show_page(self, page_name):
         """Raise the given page to the front."""
         page = self.pages[page_name]
@@ -417,48 +2864,16 @@ class HomePage:
         sections_frame = ttk.LabelFrame(self.frame, text="Secțiuni disponibile", padding=20)
         sections_frame.pack(fill=tk.BOTH, expand=True, padx=20)
 
-        # --- Section buttons ---
-        # Each button is a row with icon-like label + description + arrow
-
-        self._add_section_button(
-            sections_frame,
-            title="3.5.2  Generator PTE",
-            description="Proceduri Tehnice de Execuție - generare din Metodologia de Execuție",
-            command=lambda: app.show_page("pte"),
-            enabled=True
-        )
-
-        self._add_section_button(
-            sections_frame,
-            title="2.  Metodologia de executare",
-            description="Descrierea lucrărilor și echipamentelor necesare",
-            command=None,
-            enabled=False
-        )
-
-        self._add_section_button(
-            sections_frame,
-            title="1.  Rezumat",
-            description="Date generale, obiectul contractului, avantaje competitive",
-            command=lambda: app.show_page("rezumat"),
-            enabled=True
-        )
-
-        self._add_section_button(
-            sections_frame,
-            title="3.6  Puncte de control calitate",
-            description="Verificări și teste pe faze de execuție",
-            command=None,
-            enabled=False
-        )
-
-        self._add_section_button(
-            sections_frame,
-            title="5.  Personal propus",
-            description="Echipa de proiect și responsabilități",
-            command=None,
-            enabled=False
-        )
+        # --- Section buttons, one per registered section ---
+        for section in proposal_sections():
+            page_name = section.page or section.id
+            self._add_section_button(
+                sections_frame,
+                title=f"{section.number}{'.' if '.' not in section.number else ''}  {section.menu_title}",
+                description=section.description,
+                command=lambda page_name=page_name: app.show_page(page_name),
+                enabled=not section.planned
+            )
 
         # Settings at the bottom
         settings_frame = ttk.LabelFrame(self.frame, text="Setări globale", padding=10)
@@ -474,10 +2889,17 @@ class HomePage:
         ttk.Label(model_row, text="Model:", width=15).pack(side=tk.LEFT)
         ttk.Combobox(
             model_row, textvariable=app.model, state='readonly',
-            values=['claude-haiku-4-5-20251001', 'claude-sonnet-4-20250514', 'claude-opus-4-20250514'],
+            values=MODELS,
             width=40
         ).pack(side=tk.LEFT)
 
+        cache_row = ttk.Frame(settings_frame)
+        cache_row.pack(fill=tk.X, pady=2)
+        ttk.Checkbutton(
+            cache_row, variable=app.use_response_cache,
+            text="Refolosește răspunsurile din cache pentru intrări identice"
+        ).pack(side=tk.LEFT)
+
         # Company data
         company_frame = ttk.LabelFrame(self.frame, text="Date companie", padding=10)
         company_frame.pack(fill=tk.X, padx=20, pady=(10, 0))
@@ -649,37 +3071,16 @@ class PTEPage:
 
     def _generate(self):
         try:
-            # Step 1: Extract PDF text
-            self._log("Pas 1/3: Se extrage textul din PDF...")
-            pdf_path = self.methodology_path.get()
-            pages = extract_pdf_text(pdf_path)
-            total_chars = sum(len(p) for p in pages)
-            self._log(f"  Extras {len(pages)} pagini, {total_chars} caractere")
-
-            # Step 2: Generate PTE via Claude (split into 2 chunks)
-            self._log("Pas 2/3: Se generează PTE prin Claude API...")
-            self._log(f"  Model: {self.app.model.get()}")
-
-            pte_text = generate_pte(
-                pages,
+            output_path = self.output_path.get()
+            run_pte(
+                self.methodology_path.get(),
+                output_path,
                 api_key=self.app.api_key.get(),
                 model=self.app.model.get(),
-                progress_callback=self._log
+                progress_callback=self._log,
+                use_cache=self.app.use_response_cache.get()
             )
 
-            # Save raw text for reference
-            raw_path = self.output_path.get().replace('.docx', '_raw.txt')
-            with open(raw_path, 'w', encoding='utf-8') as f:
-                f.write(pte_text)
-            self._log(f"  Text brut salvat: {raw_path}")
-
-            # Step 3: Build DOCX
-            self._log("Pas 3/3: Se construiește documentul DOCX...")
-            output_path = self.output_path.get()
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            build_docx(pte_text, output_path)
-            self._log(f"  Document salvat: {output_path}")
-
             self._log("\nGata! Documentul a fost generat cu succes.")
             self.app.root.after(0, lambda: messagebox.showinfo(
                 "Succes", f"PTE generat cu succes!\n\n{output_path}"))
@@ -690,10 +3091,14 @@ class PTEPage:
                 "Eroare API", "Cheia API Anthropic este invalidă."))
         except anthropic.BadRequestError as e:
             self._log(f"EROARE API: {e}")
-            self.app.root.after(0, lambda: messagebox.showerror("Eroare API", str(e)))
+            self.app.root.after(0, lambda msg=str(e): messagebox.showerror("Eroare API", msg))
         except Exception as e:
             self._log(f"EROARE: {e}")
-            self.app.root.after(0, lambda: messagebox.showerror("Eroare", str(e)))
+            message = str(e)
+            if _is_retryable(e):
+                message += ("\n\nAPI-ul nu a răspuns nici după reîncercări. Părțile finalizate au fost "
+                            "salvate - apasă din nou „Generează PTE” pentru a continua de unde s-a oprit.")
+            self.app.root.after(0, lambda: messagebox.showerror("Eroare", message))
         finally:
             self.generating = False
             self.app.root.after(0, lambda: self.gen_btn.config(state=tk.NORMAL))
@@ -849,56 +3254,209 @@ class RezumatPage:
 
     def _generate(self):
         try:
-            # Step 1: Extract text from all 3 PDFs
-            self._log("Pas 1/3: Se extrage textul din PDF-uri...")
-
-            self._log(f"  Anunț: {os.path.basename(self.notice_path.get())}")
-            notice_pages = extract_pdf_text(self.notice_path.get())
-            self._log(f"    {len(notice_pages)} pagini, {sum(len(p) for p in notice_pages)} caractere")
-
-            self._log(f"  Fișa de date: {os.path.basename(self.datasheet_path.get())}")
-            datasheet_pages = extract_pdf_text(self.datasheet_path.get())
-            self._log(f"    {len(datasheet_pages)} pagini, {sum(len(p) for p in datasheet_pages)} caractere")
-
-            self._log(f"  ATR: {os.path.basename(self.atr_path.get())}")
-            atr_pages = extract_pdf_text(self.atr_path.get())
-            self._log(f"    {len(atr_pages)} pagini, {sum(len(p) for p in atr_pages)} caractere")
-
-            # Step 2: Generate Rezumat via Claude
-            self._log("Pas 2/3: Se generează Rezumatul prin Claude API...")
-            self._log(f"  Model: {self.app.model.get()}")
-
-            company_data = {
-                'leader': self.app.company_leader.get(),
-                'associate': self.app.company_associate.get(),
-                'subcontractor': self.app.company_subcontractor.get(),
-                'warranty_months': self.app.warranty_months.get(),
-                'pm_experience': self.app.pm_experience.get(),
-            }
-
-            rezumat_text = generate_rezumat(
-                notice_pages, datasheet_pages, atr_pages, company_data,
+            company_data = self.app.company_data()
+
+            output_path = self.output_path.get()
+            run_rezumat(
+                self.notice_path.get(),
+                self.datasheet_path.get(),
+                self.atr_path.get(),
+                output_path,
+                company_data,
                 api_key=self.app.api_key.get(),
                 model=self.app.model.get(),
-                progress_callback=self._log
+                progress_callback=self._log,
+                use_cache=self.app.use_response_cache.get()
             )
 
-            # Save raw text for reference
-            raw_path = self.output_path.get().replace('.docx', '_raw.txt')
-            with open(raw_path, 'w', encoding='utf-8') as f:
-                f.write(rezumat_text)
-            self._log(f"  Text brut salvat: {raw_path}")
+            self._log("\nGata! Rezumatul a fost generat cu succes.")
+            self.app.root.after(0, lambda: messagebox.showinfo(
+                "Succes", f"Rezumat generat cu succes!\n\n{output_path}"))
+
+        except anthropic.AuthenticationError:
+            self._log("EROARE: Cheie API invalidă!")
+            self.app.root.after(0, lambda: messagebox.showerror(
+                "Eroare API", "Cheia API Anthropic este invalidă."))
+        except anthropic.BadRequestError as e:
+            self._log(f"EROARE API: {e}")
+            self.app.root.after(0, lambda msg=str(e): messagebox.showerror("Eroare API", msg))
+        except Exception as e:
+            self._log(f"EROARE: {e}")
+            self.app.root.after(0, lambda msg=str(e): messagebox.showerror("Eroare", msg))
+        finally:
+            self.generating = False
+            self.app.root.after(0, lambda: self.gen_btn.config(state=tk.NORMAL))
+            self.app.root.after(0, self.progress.stop)
+
+
+# ---------------------------------------------------------------------------
+# GUI - GENERIC SECTION PAGE
+# ---------------------------------------------------------------------------
+class SectionPage:
+    """Page for any registered section: one file row per declared input."""
+
+    def __init__(self, parent, app, section):
+        self.app = app
+        self.section = section
+        self.name = section.id
+        self.frame = ttk.Frame(parent, padding=15)
+        self.input_paths = {role: tk.StringVar() for role in self._all_inputs()}
+        self.output_path = tk.StringVar()
+        self.generating = False
+
+        self._build_ui()
+
+    def _all_inputs(self):
+        """Input roles of the section and of everything upstream of it."""
+        roles = []
+        for section in _section_order([self.section.id]):
+            roles += [role for role in section.inputs if role not in roles]
+        return roles
+
+    @property
+    def _output_name(self):
+        return f"S{self.section.number.replace('.', '_')}_{self.section.id}.docx"
+
+    def _build_ui(self):
+        # Top bar: back button + title
+        top = ttk.Frame(self.frame)
+        top.pack(fill=tk.X, pady=(0, 10))
+
+        ttk.Button(top, text="< Înapoi", command=lambda: self.app.show_page("home")).pack(side=tk.LEFT)
+        ttk.Label(
+            top,
+            text=f"{self.section.heading} - {self.section.description}",
+            font=('Arial', 13, 'bold')
+        ).pack(side=tk.LEFT, padx=15)
+
+        # --- Input files ---
+        input_frame = ttk.LabelFrame(self.frame, text="Fișiere de intrare (PDF)", padding=10)
+        input_frame.pack(fill=tk.X, pady=5)
+
+        for role, var in self.input_paths.items():
+            self._add_file_row(input_frame, f"{INPUT_LABELS[role]}:", var, f"Alege {INPUT_LABELS[role]} PDF")
+
+        # --- Output file ---
+        output_frame = ttk.LabelFrame(self.frame, text="Fișier de ieșire (DOCX)", padding=10)
+        output_frame.pack(fill=tk.X, pady=5)
+
+        output_row = ttk.Frame(output_frame)
+        output_row.pack(fill=tk.X)
+
+        ttk.Entry(output_row, textvariable=self.output_path, width=60).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(output_row, text="Alege locația...", command=self._browse_output).pack(side=tk.RIGHT, padx=(10, 0))
+
+        # --- Generate button ---
+        self.gen_btn = ttk.Button(self.frame, text="Generează", command=self._start_generation)
+        self.gen_btn.pack(pady=15)
+
+        # --- Progress ---
+        self.progress = ttk.Progressbar(self.frame, mode='indeterminate')
+        self.progress.pack(fill=tk.X, pady=5)
+
+        # --- Log ---
+        log_frame = ttk.LabelFrame(self.frame, text="Jurnal", padding=5)
+        log_frame.pack(fill=tk.BOTH, expand=True, pady=5)
+
+        self.log = scrolledtext.ScrolledText(log_frame, height=12, font=('Consolas', 9), state=tk.DISABLED)
+        self.log.pack(fill=tk.BOTH, expand=True)
+
+    def _add_file_row(self, parent, label_text, var, dialog_title):
+        """Add a labeled file selector row."""
+        row = ttk.Frame(parent)
+        row.pack(fill=tk.X, pady=2)
+
+        ttk.Label(row, text=label_text, width=28).pack(side=tk.LEFT)
+        ttk.Entry(row, textvariable=var, width=45).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(
+            row, text="...",
+            command=lambda: self._browse_pdf(var, dialog_title),
+            width=3
+        ).pack(side=tk.RIGHT, padx=(5, 0))
+
+    def _browse_pdf(self, var, title):
+        input_dir = os.path.join(BASE_DIR, 'input')
+        if not os.path.isdir(input_dir):
+            input_dir = BASE_DIR
+        path = filedialog.askopenfilename(
+            title=title,
+            filetypes=[("PDF Files", "*.pdf"), ("All Files", "*.*")],
+            initialdir=input_dir
+        )
+        if path:
+            var.set(path)
+            # Auto-set output path if not set
+            if not self.output_path.get():
+                output_dir = os.path.join(BASE_DIR, 'output')
+                os.makedirs(output_dir, exist_ok=True)
+                self.output_path.set(os.path.join(output_dir, self._output_name))
+
+    def _browse_output(self):
+        current = self.output_path.get()
+        if current and os.path.isdir(os.path.dirname(current)):
+            initial_dir = os.path.dirname(current)
+            initial_file = os.path.basename(current)
+        else:
+            initial_dir = os.path.expanduser('~\\Desktop')
+            initial_file = self._output_name
+        path = filedialog.asksaveasfilename(
+            title=f"Salvează {self.section.title} ca DOCX",
+            filetypes=[("Word Document", "*.docx")],
+            defaultextension=".docx",
+            initialdir=initial_dir,
+            initialfile=initial_file
+        )
+        if path:
+            self.output_path.set(path)
 
-            # Step 3: Build DOCX
-            self._log("Pas 3/3: Se construiește documentul DOCX...")
+    def _log(self, message):
+        """Thread-safe logging."""
+        def _update():
+            self.log.config(state=tk.NORMAL)
+            self.log.insert(tk.END, message + '\n')
+            self.log.see(tk.END)
+            self.log.config(state=tk.DISABLED)
+        self.app.root.after(0, _update)
+
+    def _start_generation(self):
+        if self.generating:
+            return
+
+        for role, var in self.input_paths.items():
+            if not var.get():
+                messagebox.showerror("Eroare", f"Alege fișierul PDF: {INPUT_LABELS[role]}!")
+                return
+        if not self.output_path.get():
+            messagebox.showerror("Eroare", "Alege locația fișierului de ieșire!")
+            return
+        if not self.app.api_key.get():
+            messagebox.showerror("Eroare", "Introdu cheia API Anthropic în setări (pagina principală)!")
+            return
+
+        self.generating = True
+        self.gen_btn.config(state=tk.DISABLED)
+        self.progress.start(10)
+
+        thread = threading.Thread(target=self._generate, daemon=True)
+        thread.start()
+
+    def _generate(self):
+        try:
             output_path = self.output_path.get()
-            os.makedirs(os.path.dirname(output_path), exist_ok=True)
-            build_docx(rezumat_text, output_path, doc_type="generic")
-            self._log(f"  Document salvat: {output_path}")
+            run_section(
+                self.section.id,
+                {role: var.get() for role, var in self.input_paths.items()},
+                output_path,
+                self.app.company_data(),
+                api_key=self.app.api_key.get(),
+                model=self.app.model.get(),
+                progress_callback=self._log,
+                use_cache=self.app.use_response_cache.get()
+            )
 
-            self._log("\nGata! Rezumatul a fost generat cu succes.")
+            self._log("\nGata! Documentul a fost generat cu succes.")
             self.app.root.after(0, lambda: messagebox.showinfo(
-                "Succes", f"Rezumat generat cu succes!\n\n{output_path}"))
+                "Succes", f"{self.section.heading} generat cu succes!\n\n{output_path}"))
 
         except anthropic.AuthenticationError:
             self._log("EROARE: Cheie API invalidă!")
@@ -906,10 +3464,10 @@ class RezumatPage:
                 "Eroare API", "Cheia API Anthropic este invalidă."))
         except anthropic.BadRequestError as e:
             self._log(f"EROARE API: {e}")
-            self.app.root.after(0, lambda: messagebox.showerror("Eroare API", str(e)))
+            self.app.root.after(0, lambda msg=str(e): messagebox.showerror("Eroare API", msg))
         except Exception as e:
             self._log(f"EROARE: {e}")
-            self.app.root.after(0, lambda: messagebox.showerror("Eroare", str(e)))
+            self.app.root.after(0, lambda msg=str(e): messagebox.showerror("Eroare", msg))
         finally:
             self.generating = False
             self.app.root.after(0, lambda: self.gen_btn.config(state=tk.NORMAL))
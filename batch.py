@@ -0,0 +1,248 @@
+"""
+Headless batch generation - runs PTE and Rezumat for many tenders without the GUI.
+
+Usage:
+    python batch.py manifest.json [--concurrency 2] [--model MODEL] [--summary summary.json] [--proposal]
+
+The manifest is a JSON file, either a plain list of tender directories or:
+
+    {
+        "model": "claude-sonnet-4-20250514",
+        "company": {"leader": "...", "warranty_months": 120},
+        "tenders": [
+            "input/tender_a",
+            {
+                "dir": "input/tender_b",
+                "output_dir": "output/tender_b",
+                "sections": ["pte"],
+                "methodology": "Metodologie.pdf",
+                "notice": "Anunt.pdf",
+                "datasheet": "Fisa de date.pdf",
+                "atr": "ATR.pdf"
+            }
+        ]
+    }
+
+Input files that are not listed explicitly are detected in the tender directory
+by name (metodologie / anunț / fișa de date / ATR). Each tender gets a PTE if a
+methodology is found and a Rezumat if all three Rezumat inputs are found.
+With --proposal each tender instead gets one Propunere_tehnica.docx with all
+the sections it has inputs for (see proposal.py).
+"""
+import os
+import re
+import sys
+import json
+import time
+import argparse
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+from app import (
+    BASE_DIR, DEFAULT_MODEL, DEFAULT_COMPANY_DATA, TokenUsage,
+    anthropic_api_key, run_pte, run_rezumat,
+)
+from proposal import generate_proposal
+
+
+# Lowercase, diacritics-free substrings used to recognise input PDFs by file name
+# Patterns matched at the start of a word of the normalized file name
+# ("Contract_cadru.pdf" and "Criterii de atribuire.pdf" are not ATRs)
+INPUT_PATTERNS = {
+    'methodology': (r'metodolog',),
+    'notice': (r'anunt', r'notice'),
+    'datasheet': (r'fisa', r'datasheet'),
+    'atr': (r'atr(?![a-z])', r'aviz[ _-]*tehnic'),
+}
+
+_print_lock = threading.Lock()
+
+
+def _log(prefix, message):
+    with _print_lock:
+        print(f"[{prefix}] {message}", flush=True)
+
+
+def _normalize(name):
+    """Lowercase file name without diacritics, for pattern matching."""
+    decomposed = unicodedata.normalize('NFKD', name)
+    return ''.join(c for c in decomposed if not unicodedata.combining(c)).lower()
+
+
+def _matches_role(normalized, role):
+    """Whether a normalized file name matches one of the role's INPUT_PATTERNS."""
+    return any(re.search(rf'(?<![a-z]){pattern}', normalized) for pattern in INPUT_PATTERNS[role])
+
+
+def _find_input(tender_dir, role):
+    """Find the PDF for an input role in a tender directory, by file name."""
+    for name in sorted(os.listdir(tender_dir)):
+        if not name.lower().endswith('.pdf'):
+            continue
+        normalized = _normalize(name)
+        if _matches_role(normalized, role):
+            return os.path.join(tender_dir, name)
+    return None
+
+
+def _resolve_tender(entry, manifest_dir):
+    """Normalize a manifest entry to a dict with absolute input/output paths."""
+    if isinstance(entry, str):
+        entry = {'dir': entry}
+    tender_dir = os.path.join(manifest_dir, entry['dir'])
+    name = entry.get('name') or os.path.basename(os.path.normpath(tender_dir))
+    output_dir = os.path.join(manifest_dir, entry['output_dir']) if entry.get('output_dir') \
+        else os.path.join(BASE_DIR, 'output', name)
+
+    inputs = {}
+    for role in INPUT_PATTERNS:
+        if entry.get(role):
+            inputs[role] = os.path.join(tender_dir, entry[role])
+        else:
+            inputs[role] = _find_input(tender_dir, role)
+
+    sections = entry.get('sections')
+    if sections is None:
+        sections = []
+        if inputs['methodology']:
+            sections.append('pte')
+        if inputs['notice'] and inputs['datasheet'] and inputs['atr']:
+            sections.append('rezumat')
+
+    return {'name': name, 'dir': tender_dir, 'output_dir': output_dir,
+            'inputs': inputs, 'sections': sections}
+
+
+def _run_job(tender, section, api_key, model, company_data, use_cache):
+    """Run one section of one tender; never raises, returns a summary record."""
+    label = f"{tender['name']}/{section}"
+    record = {'tender': tender['name'], 'section': section, 'status': 'ok'}
+    started = time.monotonic()
+    inputs = tender['inputs']
+
+    def progress(message):
+        _log(label, message.strip())
+
+    try:
+        if section == 'pte':
+            if not inputs['methodology']:
+                raise FileNotFoundError("Metodologia de execuție (PDF) lipsește")
+            base_name = os.path.splitext(os.path.basename(inputs['methodology']))[0]
+            result = run_pte(
+                inputs['methodology'],
+                os.path.join(tender['output_dir'], f'PTE_{base_name}.docx'),
+                api_key=api_key, model=model,
+                progress_callback=progress, use_cache=use_cache,
+            )
+        elif section == 'proposal':
+            result = generate_proposal(
+                inputs, os.path.join(tender['output_dir'], 'Propunere_tehnica.docx'),
+                api_key=api_key, model=model, company_data=company_data,
+                progress_callback=progress, use_cache=use_cache,
+            )
+        elif section == 'rezumat':
+            missing = [role for role in ('notice', 'datasheet', 'atr') if not inputs[role]]
+            if missing:
+                raise FileNotFoundError(f"Fișiere de intrare lipsă: {', '.join(missing)}")
+            result = run_rezumat(
+                inputs['notice'], inputs['datasheet'], inputs['atr'],
+                os.path.join(tender['output_dir'], 'S01_Rezumat.docx'),
+                company_data, api_key=api_key, model=model,
+                progress_callback=progress, use_cache=use_cache,
+            )
+        else:
+            raise ValueError(f"Secțiune necunoscută: {section}")
+        record.update(result)
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+        record['seconds'] = round(time.monotonic() - started, 2)
+        _log(label, f"EROARE: {e}")
+    return record
+
+
+def load_manifest(manifest_path, model=None):
+    """Read a manifest; returns (model, company_data, tenders) with the tenders resolved."""
+    with open(manifest_path, 'r', encoding='utf-8') as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'tenders': manifest}
+
+    manifest_dir = os.path.dirname(os.path.abspath(manifest_path))
+    model = model or manifest.get('model') or DEFAULT_MODEL
+    company_data = dict(DEFAULT_COMPANY_DATA, **manifest.get('company', {}))
+    tenders = [_resolve_tender(entry, manifest_dir) for entry in manifest['tenders']]
+    return model, company_data, tenders
+
+
+def run_batch(manifest_path, concurrency=2, model=None, api_key=None, use_cache=True, proposal=False):
+    """Run every section of every tender in the manifest; returns the summary dict.
+
+    proposal=True runs one full-proposal job per tender instead of separate sections.
+    """
+    model, company_data, tenders = load_manifest(manifest_path, model)
+    api_key = api_key or anthropic_api_key
+    if proposal:
+        for tender in tenders:
+            tender['sections'] = ['proposal']
+
+    started_at = time.strftime('%Y-%m-%dT%H:%M:%S')
+    started = time.monotonic()
+    records = []
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        futures = [
+            pool.submit(_run_job, tender, section, api_key, model, company_data, use_cache)
+            for tender in tenders
+            for section in tender['sections']
+        ]
+        for future in as_completed(futures):
+            records.append(future.result())
+
+    records.sort(key=lambda r: (r['tender'], r['section']))
+    totals = TokenUsage()
+    for record in records:
+        totals.add(**record.get('usage', {}))
+
+    return {
+        'started_at': started_at,
+        'seconds': round(time.monotonic() - started, 2),
+        'model': model,
+        'concurrency': concurrency,
+        'jobs': records,
+        'failed': sum(1 for r in records if r['status'] != 'ok'),
+        'usage': totals.as_dict(),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generare PTE și Rezumat pentru mai multe licitații, fără interfață grafică.")
+    parser.add_argument('manifest', help="fișier JSON cu lista de licitații")
+    parser.add_argument('--concurrency', type=int, default=2, help="număr de generări rulate simultan (implicit 2)")
+    parser.add_argument('--model', help=f"modelul Claude (implicit din manifest sau {DEFAULT_MODEL})")
+    parser.add_argument('--summary', help="unde se scrie sumarul JSON (implicit output/batch_summary.json)")
+    parser.add_argument('--no-cache', action='store_true', help="nu refolosi răspunsurile din cache")
+    parser.add_argument('--proposal', action='store_true',
+                        help="un singur document Propunere_tehnica.docx pe licitație, cu toate secțiunile")
+    args = parser.parse_args(argv)
+
+    summary = run_batch(args.manifest, concurrency=args.concurrency, model=args.model,
+                        use_cache=not args.no_cache, proposal=args.proposal)
+
+    summary_path = args.summary or os.path.join(BASE_DIR, 'output', 'batch_summary.json')
+    os.makedirs(os.path.dirname(os.path.abspath(summary_path)), exist_ok=True)
+    with open(summary_path, 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+
+    print(f"\n{len(summary['jobs'])} generări, {summary['failed']} eșuate, {summary['seconds']} s")
+    print(f"Tokeni: {summary['usage']['input_tokens']} input, {summary['usage']['output_tokens']} output, "
+          f"~{summary['usage']['pruned_tokens']} economisiți prin reducerea contextului")
+    print(f"Cost estimat: ${summary['usage']['cost_usd']:.4f}; {summary['usage']['routed_calls']} apeluri "
+          f"rutate către modelul rapid, ~${summary['usage']['cost_saved_usd']:.4f} și "
+          f"~{summary['usage']['seconds_saved']:.0f} s de generare economisite")
+    print(f"Sumar salvat: {summary_path}")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
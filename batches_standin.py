@@ -0,0 +1,214 @@
+"""
+Local stand-in for the Anthropic Messages and Message Batches API, for testing message_batches.py.
+
+Usage:
+    python batches_standin.py [--port 5060] [--delay 5] [--fail-every 0]
+    python message_batches.py submit manifest.json --base-url http://127.0.0.1:5060
+    python message_batches.py collect <batch id> --wait --interval 2 --base-url http://127.0.0.1:5060
+
+Keeps everything in memory and answers every request with a short placeholder
+text (or "{}" when the prompt asks for JSON). A batch ends --delay seconds
+after it was created; with --fail-every N every N-th request of a batch comes
+back errored. Implements only what the application uses: batch create,
+retrieve and results (JSONL), and /v1/messages with or without streaming.
+"""
+import re
+import sys
+import json
+import time
+import uuid
+import argparse
+import threading
+from datetime import datetime, timedelta, timezone
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit
+
+
+_BATCH_RE = re.compile(r'^/v1/messages/batches/([\w-]+)(/results)?$')
+
+
+def _timestamp(seconds):
+    return datetime.fromtimestamp(seconds, timezone.utc).isoformat().replace('+00:00', 'Z')
+
+
+def _reply_text(params):
+    """Placeholder answer for one Messages request."""
+    system = params.get('system') or ''
+    if not isinstance(system, str):
+        system = ' '.join(block.get('text', '') for block in system)
+    prompt = params['messages'][0]['content']
+    if 'JSON' in system or 'JSON' in prompt:
+        return '{}'
+    first_line = next((line.strip() for line in prompt.splitlines() if line.strip()), '')
+    return (f"### Răspuns simulat\n\n**Cerere**: {first_line[:80]}\n\n"
+            f"Text generat de serverul local pentru un prompt de {len(prompt)} caractere.")
+
+
+def _message(params):
+    text = _reply_text(params)
+    prompt_chars = len(json.dumps(params.get('system') or '')) + len(params['messages'][0]['content'])
+    return {
+        'id': f'msg_{uuid.uuid4().hex[:24]}',
+        'type': 'message',
+        'role': 'assistant',
+        'model': params.get('model'),
+        'content': [{'type': 'text', 'text': text}],
+        'stop_reason': 'end_turn',
+        'stop_sequence': None,
+        'usage': {'input_tokens': prompt_chars // 4, 'output_tokens': len(text) // 4},
+    }
+
+
+class BatchesStandIn:
+    """In-memory batch store."""
+
+    def __init__(self, delay=5.0, fail_every=0):
+        self.delay = delay
+        self.fail_every = fail_every
+        self.lock = threading.Lock()
+        self.batches = {}
+
+    def create(self, requests, base_url):
+        batch_id = f'msgbatch_{uuid.uuid4().hex[:24]}'
+        with self.lock:
+            self.batches[batch_id] = {
+                'requests': requests,
+                'created': time.time(),
+                'results_url': f'{base_url}/v1/messages/batches/{batch_id}/results',
+            }
+        return self.describe(batch_id)
+
+    def describe(self, batch_id):
+        batch = self.batches[batch_id]
+        created = batch['created']
+        ended = time.time() >= created + self.delay
+        count = len(batch['requests'])
+        failed = count // self.fail_every if self.fail_every else 0
+        return {
+            'id': batch_id,
+            'type': 'message_batch',
+            'processing_status': 'ended' if ended else 'in_progress',
+            'request_counts': {
+                'processing': 0 if ended else count,
+                'succeeded': count - failed if ended else 0,
+                'errored': failed if ended else 0,
+                'canceled': 0,
+                'expired': 0,
+            },
+            'created_at': _timestamp(created),
+            'expires_at': _timestamp(created + timedelta(days=1).total_seconds()),
+            'ended_at': _timestamp(created + self.delay) if ended else None,
+            'cancel_initiated_at': None,
+            'archived_at': None,
+            'results_url': batch['results_url'] if ended else None,
+        }
+
+    def results(self, batch_id):
+        lines = []
+        for i, request in enumerate(self.batches[batch_id]['requests'], start=1):
+            if self.fail_every and i % self.fail_every == 0:
+                result = {'type': 'errored',
+                          'error': {'type': 'error', 'error': {'type': 'api_error', 'message': 'simulated'}}}
+            else:
+                result = {'type': 'succeeded', 'message': _message(request['params'])}
+            lines.append(json.dumps({'custom_id': request['custom_id'], 'result': result}, ensure_ascii=False))
+        return ('\n'.join(lines) + '\n').encode('utf-8')
+
+
+def _sse(message):
+    """The message as a Messages API event stream."""
+    text = message['content'][0]['text']
+    start = dict(message, content=[], stop_reason=None, usage=dict(message['usage'], output_tokens=0))
+    events = [
+        ('message_start', {'type': 'message_start', 'message': start}),
+        ('content_block_start', {'type': 'content_block_start', 'index': 0,
+                                 'content_block': {'type': 'text', 'text': ''}}),
+    ]
+    for i in range(0, len(text), 40):
+        events.append(('content_block_delta', {'type': 'content_block_delta', 'index': 0,
+                                               'delta': {'type': 'text_delta', 'text': text[i:i + 40]}}))
+    events += [
+        ('content_block_stop', {'type': 'content_block_stop', 'index': 0}),
+        ('message_delta', {'type': 'message_delta',
+                           'delta': {'stop_reason': message['stop_reason'], 'stop_sequence': None},
+                           'usage': {'output_tokens': message['usage']['output_tokens']}}),
+        ('message_stop', {'type': 'message_stop'}),
+    ]
+    return ''.join(f"event: {name}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+                   for name, data in events).encode('utf-8')
+
+
+def make_handler(store):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, payload, content_type='application/json'):
+            body = payload if isinstance(payload, bytes) else json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            body = json.loads(self.rfile.read(length)) if length else None
+            path = urlsplit(self.path).path
+
+            if path == '/v1/messages' and self.command == 'POST':
+                message = _message(body)
+                if body.get('stream'):
+                    return self._reply(200, _sse(message), 'text/event-stream')
+                return self._reply(200, message)
+
+            if path == '/v1/messages/batches' and self.command == 'POST':
+                base_url = f"http://{self.headers.get('Host')}"
+                return self._reply(200, store.create(body['requests'], base_url))
+
+            match = _BATCH_RE.match(path)
+            if match and self.command == 'GET':
+                batch_id, results = match.groups()
+                with store.lock:
+                    if batch_id not in store.batches:
+                        return self._reply(404, {'type': 'error',
+                                                 'error': {'type': 'not_found_error', 'message': batch_id}})
+                    if results:
+                        return self._reply(200, store.results(batch_id), 'application/binary')
+                    return self._reply(200, store.describe(batch_id))
+
+            self._reply(404, {'type': 'error', 'error': {'type': 'not_found_error',
+                                                         'message': f'{self.command} {path}'}})
+
+        do_GET = do_POST = _dispatch
+
+        def log_message(self, fmt, *args):
+            sys.stderr.write(f"[batches] {fmt % args}\n")
+
+    return Handler
+
+
+def serve(store, host='127.0.0.1', port=5060):
+    """Start the stand-in in a background thread; returns the server (call shutdown())."""
+    server = ThreadingHTTPServer((host, port), make_handler(store))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server local care imită API-ul Anthropic Message Batches.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5060)
+    parser.add_argument('--delay', type=float, default=5.0, help="secunde până la încheierea unui lot")
+    parser.add_argument('--fail-every', type=int, default=0,
+                        help="fiecare a N-a cerere dintr-un lot se întoarce cu eroare (0 = niciuna)")
+    args = parser.parse_args(argv)
+
+    store = BatchesStandIn(delay=args.delay, fail_every=args.fail_every)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store))
+    print(f"Message Batches stand-in pe http://{args.host}:{args.port}")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
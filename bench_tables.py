@@ -0,0 +1,77 @@
+"""
+Benchmark: markdown table -> DOCX table, bulk writer vs. per-cell table.cell(i, j).
+
+Usage:
+    python bench_tables.py [--cols 4] [--sizes 100,200,400,800,1600] [--per-cell-max 400]
+
+For every table size it times _add_table (bulk XML) and the previous per-cell
+approach, and prints the time per row. Linear scaling shows up as a flat
+ms/row column; the per-cell approach grows with the row count (it is
+quadratic, so it only runs up to --per-cell-max rows).
+"""
+import sys
+import time
+import argparse
+
+from docx.shared import Pt
+
+from app import _add_table, _new_document, _document_styles, _parse_table_rows, TABLE_STYLE
+
+
+def _markdown_table(num_rows, num_cols):
+    rows = ['| ' + ' | '.join(f'Coloana {j + 1}' for j in range(num_cols)) + ' |',
+            '|' + '---|' * num_cols]
+    for i in range(num_rows):
+        rows.append('| ' + ' | '.join(f'Valoare {i}.{j}' for j in range(num_cols)) + ' |')
+    return rows
+
+
+def _add_table_per_cell(doc, rows):
+    """The previous implementation: one table.cell(i, j) lookup per cell."""
+    data_rows = _parse_table_rows(rows)
+    num_cols = max(len(r) for r in data_rows)
+    table = doc.add_table(rows=len(data_rows), cols=num_cols)
+    table.style = TABLE_STYLE
+    for i, row_data in enumerate(data_rows):
+        for j, cell_text in enumerate(row_data):
+            cell = table.cell(i, j)
+            cell.text = cell_text
+            for paragraph in cell.paragraphs:
+                for run in paragraph.runs:
+                    run.font.name = 'Arial Narrow'
+                    run.font.size = Pt(11)
+
+
+def _time(fn, rows):
+    doc = _new_document()
+    styles = _document_styles(doc)
+    started = time.perf_counter()
+    if fn is _add_table:
+        fn(doc, rows, styles)
+    else:
+        fn(doc, rows)
+    return time.perf_counter() - started
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark pentru scrierea tabelelor în DOCX.")
+    parser.add_argument('--cols', type=int, default=4)
+    parser.add_argument('--sizes', default='100,200,400,800,1600')
+    parser.add_argument('--per-cell-max', type=int, default=400,
+                        help="cel mai mare tabel măsurat și cu metoda per-celulă")
+    args = parser.parse_args(argv)
+
+    print(f"{'rânduri':>8} {'bulk ms':>10} {'ms/rând':>8} {'per-celulă ms':>14} {'ms/rând':>8}")
+    for num_rows in (int(n) for n in args.sizes.split(',')):
+        rows = _markdown_table(num_rows, args.cols)
+        bulk = _time(_add_table, rows) * 1000
+        line = f"{num_rows:>8} {bulk:>10.1f} {bulk / num_rows:>8.3f}"
+        if num_rows <= args.per_cell_max:
+            per_cell = _time(_add_table_per_cell, rows) * 1000
+            line += f" {per_cell:>14.1f} {per_cell / num_rows:>8.3f}"
+        print(line, flush=True)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
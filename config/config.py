@@ -15,3 +15,9 @@ creatio_base_url = _cfg["creatioBaseUrl"]
 creatio_auth_secret = _cfg["creatioAuthSecret"]
 listening_host = _cfg["listeningHost"]
 listening_port = _cfg["listeningPort"]
+# Optional: per-model API limits, {"model": {"rpm": ..., "itpm": ..., "otpm": ...}}
+rate_limits = _cfg.get("rateLimits", {})
+# Optional: shared secret server.py requires from its clients
+service_token = _cfg.get("serviceToken")
+# Optional: which requests go to a cheaper model, see ROUTING in app.py
+model_routing = _cfg.get("modelRouting", {})
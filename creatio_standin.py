@@ -0,0 +1,180 @@
+"""
+Local stand-in for the Creatio OData 4 API, for testing creatio_worker.py.
+
+Usage:
+    python creatio_standin.py --seed input/ [--port 5050] [--secret test]
+    python creatio_worker.py --once --base-url http://127.0.0.1:5050
+
+Keeps everything in memory. --seed creates one pending tender per
+subdirectory, with the PDFs in it as attachments. Implements only what the
+worker uses: entity queries with "Field eq value" filters, $top/$select,
+attachment Data download/upload, record insert/update and JSON $batch.
+"""
+import os
+import re
+import sys
+import json
+import uuid
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlsplit, parse_qs
+
+from creatio_worker import (
+    TENDER_ENTITY, TENDER_FILE_ENTITY, STATUS_FIELD, FILE_TENDER_FIELD, STATUS_PENDING,
+)
+
+
+_ENTITY_RE = re.compile(r'^/0/odata/(\w+)(?:\(([^)]+)\))?(/Data)?$')
+_FILTER_RE = re.compile(r"^(\w+) eq (?:'([^']*)'|([\w-]+))$")
+
+
+class CreatioStandIn:
+    """In-memory entity store."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.entities = {}
+        self.blobs = {}
+
+    def insert(self, entity, record):
+        record = dict(record)
+        record.setdefault('Id', str(uuid.uuid4()))
+        with self.lock:
+            self.entities.setdefault(entity, {})[record['Id']] = record
+        return record
+
+    def seed(self, directory):
+        for name in sorted(os.listdir(directory)):
+            tender_dir = os.path.join(directory, name)
+            if not os.path.isdir(tender_dir):
+                continue
+            tender = self.insert(TENDER_ENTITY, {'Name': name, STATUS_FIELD: STATUS_PENDING})
+            for file_name in sorted(os.listdir(tender_dir)):
+                if file_name.lower().endswith('.pdf'):
+                    record = self.insert(TENDER_FILE_ENTITY, {'Name': file_name, FILE_TENDER_FIELD: tender['Id']})
+                    with open(os.path.join(tender_dir, file_name), 'rb') as f:
+                        self.blobs[(TENDER_FILE_ENTITY, record['Id'])] = f.read()
+
+    def handle(self, method, path, query, body, raw_body=b''):
+        """Apply one request; returns (status, json_body_or_bytes)."""
+        match = _ENTITY_RE.match(path)
+        if not match:
+            return 404, {'error': f'unknown path {path}'}
+        entity, record_id, data = match.groups()
+        if record_id:
+            record_id = record_id.strip("'")
+
+        with self.lock:
+            records = self.entities.setdefault(entity, {})
+            if data:
+                if method == 'GET':
+                    blob = self.blobs.get((entity, record_id))
+                    return (200, blob) if blob is not None else (404, {'error': 'no data'})
+                if method == 'PUT':
+                    self.blobs[(entity, record_id)] = raw_body
+                    return 204, None
+            elif record_id:
+                if record_id not in records:
+                    return 404, {'error': 'not found'}
+                if method == 'GET':
+                    return 200, records[record_id]
+                if method == 'PATCH':
+                    records[record_id].update(body or {})
+                    return 204, None
+            elif method == 'GET':
+                values = list(records.values())
+                if query.get('$filter'):
+                    field, text, literal = _FILTER_RE.match(query['$filter']).groups()
+                    expected = text if text is not None else literal
+                    values = [r for r in values if str(r.get(field)) == expected]
+                if query.get('$top'):
+                    values = values[:int(query['$top'])]
+                if query.get('$select'):
+                    fields = query['$select'].split(',')
+                    values = [{k: r.get(k) for k in fields} for r in values]
+                return 200, {'value': values}
+            elif method == 'POST':
+                record = dict(body or {})
+                record.setdefault('Id', str(uuid.uuid4()))
+                if record['Id'] in records:
+                    return 409, {'error': f"record {record['Id']} already exists"}
+                records[record['Id']] = record
+                return 201, record
+        return 405, {'error': f'{method} not supported on {path}'}
+
+
+def make_handler(store, secret):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = 'HTTP/1.1'
+
+        def _reply(self, status, payload):
+            if isinstance(payload, bytes):
+                body, content_type = payload, 'application/octet-stream'
+            elif payload is None:
+                body, content_type = b'', 'application/json'
+            else:
+                body, content_type = json.dumps(payload).encode('utf-8'), 'application/json'
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _dispatch(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            raw_body = self.rfile.read(length) if length else b''
+            if self.headers.get('Authorization') != f'Bearer {secret}':
+                return self._reply(401, {'error': 'unauthorized'})
+
+            url = urlsplit(self.path)
+            query = {k: v[0] for k, v in parse_qs(url.query).items()}
+            is_json = 'json' in (self.headers.get('Content-Type') or '')
+            body = json.loads(raw_body) if raw_body and is_json else None
+
+            if url.path == '/0/odata/$batch' and self.command == 'POST':
+                responses = []
+                for sub in body.get('requests', []):
+                    sub_url = urlsplit('/0/odata/' + sub['url'].lstrip('/'))
+                    sub_query = {k: v[0] for k, v in parse_qs(sub_url.query).items()}
+                    status, payload = store.handle(sub['method'], sub_url.path, sub_query, sub.get('body'))
+                    responses.append({'id': sub['id'], 'status': status, 'body': payload})
+                return self._reply(200, {'responses': responses})
+
+            status, payload = store.handle(self.command, url.path, query, body, raw_body)
+            self._reply(status, payload)
+
+        do_GET = do_POST = do_PUT = do_PATCH = _dispatch
+
+        def log_message(self, fmt, *args):
+            sys.stderr.write(f"[creatio] {fmt % args}\n")
+
+    return Handler
+
+
+def serve(store, host='127.0.0.1', port=5050, secret='test'):
+    """Start the stand-in in a background thread; returns the server (call shutdown())."""
+    server = ThreadingHTTPServer((host, port), make_handler(store, secret))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Server local care imită API-ul OData al Creatio.")
+    parser.add_argument('--seed', help="director cu câte un subdirector (cu PDF-uri) pentru fiecare licitație")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=5050)
+    parser.add_argument('--secret', default='test', help="secretul așteptat în antetul Authorization")
+    args = parser.parse_args(argv)
+
+    store = CreatioStandIn()
+    if args.seed:
+        store.seed(args.seed)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(store, args.secret))
+    print(f"Creatio stand-in pe http://{args.host}:{args.port} ({len(store.entities.get(TENDER_ENTITY, {}))} licitații)")
+    server.serve_forever()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
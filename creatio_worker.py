@@ -0,0 +1,365 @@
+"""
+Creatio CRM integration worker.
+
+Polls Creatio for tenders waiting for a technical proposal, downloads their
+attached PDFs, runs the PTE / Rezumat generators and uploads the DOCX files
+back as attachments of the same tender.
+
+Usage:
+    python creatio_worker.py [--once] [--interval 60] [--concurrency 2] [--base-url URL]
+
+Base URL and auth secret default to creatioBaseUrl / creatioAuthSecret from
+config/config.json. Requires requests (pip install requests).
+
+All HTTP traffic goes through one keep-alive requests.Session with a pooled
+adapter and automatic retry with exponential backoff (Retry-After is honored).
+Status updates and attachment records of a whole polling round are sent as
+OData $batch requests. For local testing, run creatio_standin.py and point
+--base-url at it.
+"""
+import os
+import sys
+import time
+import uuid
+import argparse
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from app import (
+    BASE_DIR, DEFAULT_MODEL, DEFAULT_COMPANY_DATA,
+    anthropic_api_key, run_pte, run_rezumat,
+)
+from batch import INPUT_PATTERNS, _matches_role, _normalize
+from config.config import creatio_base_url, creatio_auth_secret
+
+
+# Creatio schema used by the worker - adjust to the names in your Creatio instance
+TENDER_ENTITY = 'UsrTender'
+TENDER_FILE_ENTITY = 'UsrTenderFile'
+STATUS_FIELD = 'UsrStatus'
+STATUS_MESSAGE_FIELD = 'UsrStatusMessage'
+FILE_TENDER_FIELD = 'UsrTenderId'
+
+STATUS_PENDING = 'Nou'
+STATUS_PROCESSING = 'În lucru'
+STATUS_DONE = 'Generat'
+STATUS_ERROR = 'Eroare'
+
+CREATIO_INPUT_DIR = os.path.join(BASE_DIR, 'input', 'creatio')
+CREATIO_OUTPUT_DIR = os.path.join(BASE_DIR, 'output', 'creatio')
+
+_print_lock = threading.Lock()
+
+
+def _log(message):
+    with _print_lock:
+        print(f"{time.strftime('%H:%M:%S')} {message}", flush=True)
+
+
+class CreatioError(Exception):
+    """Creatio answered a request (or a $batch sub-request) with an error."""
+
+
+class CreatioClient:
+    """Minimal Creatio OData 4 client over one pooled keep-alive session."""
+
+    def __init__(self, base_url, auth_secret, pool_size=10, retries=5, backoff=0.5, timeout=60):
+        self.odata_url = base_url.rstrip('/') + '/0/odata'
+        self.timeout = timeout
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(429, 500, 502, 503, 504),
+            # POST creates records, so it is not retried blindly (see batch())
+            allowed_methods=frozenset({'GET', 'PUT', 'PATCH', 'DELETE'}),
+            respect_retry_after_header=True,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+
+        self.session = requests.Session()
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self.session.headers.update({
+            'Authorization': f'Bearer {auth_secret}',
+            'Accept': 'application/json',
+        })
+
+    def close(self):
+        self.session.close()
+
+    def _request(self, method, path, **kwargs):
+        # path is relative to the OData root, or a full URL such as an @odata.nextLink
+        url = path if path.startswith(('http://', 'https://')) else f'{self.odata_url}/{path}'
+        response = self.session.request(method, url, timeout=self.timeout, **kwargs)
+        if response.status_code >= 400:
+            raise CreatioError(f"{method} {path}: HTTP {response.status_code} {response.text[:200]}")
+        return response
+
+    def query(self, entity, filter=None, select=None, top=None):
+        """All records of an entity matching an OData filter (follows paging links)."""
+        params = {}
+        if filter:
+            params['$filter'] = filter
+        if select:
+            params['$select'] = ','.join(select)
+        if top:
+            params['$top'] = top
+
+        data = self._request('GET', entity, params=params).json()
+        records = data.get('value', [])
+        next_link = data.get('@odata.nextLink')
+        while next_link and not top:
+            data = self._request('GET', next_link).json()
+            records.extend(data.get('value', []))
+            next_link = data.get('@odata.nextLink')
+        return records
+
+    def download(self, entity, record_id):
+        return self._request('GET', f'{entity}({record_id})/Data').content
+
+    def update(self, entity, record_id, fields):
+        self._request('PATCH', f'{entity}({record_id})', json=fields)
+
+    def upload(self, entity, record_id, content):
+        self._request('PUT', f'{entity}({record_id})/Data', data=content,
+                      headers={'Content-Type': 'application/octet-stream'})
+
+    def batch(self, operations, attempts=3):
+        """Send (method, url, body) operations as one OData $batch request.
+
+        The whole batch is retried with backoff on 429/5xx. Operations in this
+        worker are PATCHes and inserts with client-side Ids, so a replay does
+        not create duplicates: an insert that the failed attempt had already
+        applied comes back as a conflict (409) and is counted as done.
+        """
+        if not operations:
+            return []
+        payload = {'requests': [
+            {
+                'method': method,
+                'url': url,
+                'id': str(i),
+                'headers': {'Content-Type': 'application/json;odata.metadata=minimal'},
+                'body': body,
+            }
+            for i, (method, url, body) in enumerate(operations)
+        ]}
+
+        for attempt in range(attempts):
+            response = self.session.post(f'{self.odata_url}/$batch', json=payload, timeout=self.timeout)
+            if response.status_code not in (429, 500, 502, 503, 504) or attempt == attempts - 1:
+                break
+            retry_after = response.headers.get('Retry-After')
+            time.sleep(float(retry_after) if retry_after and retry_after.isdigit() else 2 ** attempt)
+
+        if response.status_code >= 400:
+            raise CreatioError(f"$batch: HTTP {response.status_code} {response.text[:200]}")
+        responses = response.json().get('responses', [])
+        failed = [r for r in responses if r.get('status', 200) >= 400
+                  and not (attempt and r.get('status') == 409 and _batch_method(operations, r) == 'POST')]
+        if failed:
+            raise CreatioError(f"$batch: {len(failed)}/{len(responses)} operații eșuate: {failed[0]}")
+        return responses
+
+
+def _batch_method(operations, response):
+    """Method of the operation a $batch response belongs to (responses carry the request id)."""
+    try:
+        return operations[int(response.get('id'))][0]
+    except (TypeError, ValueError, IndexError):
+        return None
+
+
+def _detect_role(file_name):
+    normalized = _normalize(file_name)
+    for role in INPUT_PATTERNS:
+        if _matches_role(normalized, role):
+            return role
+    return None
+
+
+class CreatioWorker:
+    """Claims pending tenders, generates their sections and uploads the results."""
+
+    def __init__(self, client, api_key=None, model=DEFAULT_MODEL, company_data=None,
+                 concurrency=2, batch_size=10):
+        self.client = client
+        self.api_key = api_key or anthropic_api_key
+        self.model = model
+        self.company_data = company_data or dict(DEFAULT_COMPANY_DATA)
+        self.concurrency = concurrency
+        self.batch_size = batch_size
+
+    def poll_once(self):
+        """Process one round of pending tenders; returns how many were picked up."""
+        tenders = self.client.query(
+            TENDER_ENTITY,
+            filter=f"{STATUS_FIELD} eq '{STATUS_PENDING}'",
+            top=self.batch_size,
+        )
+        if not tenders:
+            return 0
+
+        _log(f"{len(tenders)} licitații noi în Creatio")
+        self.client.batch([
+            ('PATCH', f"{TENDER_ENTITY}({t['Id']})", {STATUS_FIELD: STATUS_PROCESSING, STATUS_MESSAGE_FIELD: ''})
+            for t in tenders
+        ])
+
+        with ThreadPoolExecutor(max_workers=max(1, self.concurrency)) as pool:
+            results = list(pool.map(self._process, tenders))
+
+        self._upload_results(results)
+        return len(tenders)
+
+    def run_forever(self, interval=60):
+        while True:
+            try:
+                picked = self.poll_once()
+            except (requests.RequestException, CreatioError) as e:
+                _log(f"EROARE Creatio: {e}")
+                picked = 0
+            if not picked:
+                time.sleep(interval)
+
+    def _process(self, tender):
+        """Download inputs and run the generators for one tender. Never raises."""
+        tender_id = tender['Id']
+        name = tender.get('Name') or tender_id
+        result = {'tender_id': tender_id, 'files': [], 'error': None}
+
+        def progress(message):
+            _log(f"[{name}] {message.strip()}")
+
+        try:
+            inputs = self._download_inputs(tender_id)
+            output_dir = os.path.join(CREATIO_OUTPUT_DIR, tender_id)
+
+            if inputs.get('methodology'):
+                path = os.path.join(output_dir, 'PTE.docx')
+                run_pte(inputs['methodology'], path, api_key=self.api_key, model=self.model,
+                        progress_callback=progress)
+                result['files'].append(path)
+
+            if all(inputs.get(role) for role in ('notice', 'datasheet', 'atr')):
+                path = os.path.join(output_dir, 'S01_Rezumat.docx')
+                run_rezumat(inputs['notice'], inputs['datasheet'], inputs['atr'], path,
+                            self.company_data, api_key=self.api_key, model=self.model,
+                            progress_callback=progress)
+                result['files'].append(path)
+
+            if not result['files']:
+                raise FileNotFoundError("Nu s-au găsit fișierele de intrare (metodologie sau anunț + fișa de date + ATR)")
+        except Exception as e:
+            result['error'] = f"{type(e).__name__}: {e}"
+            progress(f"EROARE: {e}")
+        return result
+
+    def _download_inputs(self, tender_id):
+        files = self.client.query(
+            TENDER_FILE_ENTITY,
+            filter=f"{FILE_TENDER_FIELD} eq {tender_id}",
+            select=['Id', 'Name'],
+        )
+        input_dir = os.path.join(CREATIO_INPUT_DIR, tender_id)
+        os.makedirs(input_dir, exist_ok=True)
+
+        inputs = {}
+        for record in files:
+            role = _detect_role(record['Name'])
+            if not role or role in inputs or not record['Name'].lower().endswith('.pdf'):
+                continue
+            path = os.path.join(input_dir, f"{role}.pdf")
+            with open(path, 'wb') as f:
+                f.write(self.client.download(TENDER_FILE_ENTITY, record['Id']))
+            inputs[role] = path
+        return inputs
+
+    def _upload_results(self, results):
+        """Bulk upload: one $batch for attachment records, file bodies, one $batch for statuses.
+
+        The status $batch is always sent: tenders whose files could not be
+        uploaded are marked STATUS_ERROR with the upload error, so none is
+        left in STATUS_PROCESSING (it would never be picked up again). If the
+        status $batch itself fails, the tenders are set back to STATUS_PENDING
+        one by one, so the next round generates them again.
+        """
+        uploads = []
+        for result in results:
+            for path in result['files']:
+                uploads.append((str(uuid.uuid4()), result['tender_id'], path))
+
+        def _failed(tender_ids, error):
+            for r in results:
+                if r['tender_id'] in tender_ids and not r['error']:
+                    r['error'] = f"Încărcare eșuată: {type(error).__name__}: {error}"
+            _log(f"EROARE la încărcarea rezultatelor: {error}")
+
+        try:
+            self.client.batch([
+                ('POST', TENDER_FILE_ENTITY, {
+                    'Id': file_id,
+                    'Name': os.path.basename(path),
+                    FILE_TENDER_FIELD: tender_id,
+                })
+                for file_id, tender_id, path in uploads
+            ])
+        except Exception as e:
+            _failed({tender_id for _, tender_id, _ in uploads}, e)
+            uploads = []
+        for file_id, tender_id, path in uploads:
+            try:
+                with open(path, 'rb') as f:
+                    self.client.upload(TENDER_FILE_ENTITY, file_id, f.read())
+            except Exception as e:
+                _failed({tender_id}, e)
+
+        try:
+            self.client.batch([
+                ('PATCH', f"{TENDER_ENTITY}({r['tender_id']})", {
+                    STATUS_FIELD: STATUS_ERROR if r['error'] else STATUS_DONE,
+                    STATUS_MESSAGE_FIELD: r['error'] or f"{len(r['files'])} documente generate",
+                })
+                for r in results
+            ])
+        except Exception as e:
+            _log(f"EROARE la actualizarea stărilor: {e} - licitațiile revin în starea '{STATUS_PENDING}'")
+            for r in results:
+                try:
+                    self.client.update(TENDER_ENTITY, r['tender_id'],
+                                       {STATUS_FIELD: STATUS_PENDING, STATUS_MESSAGE_FIELD: ''})
+                except Exception as reset_error:
+                    _log(f"EROARE: licitația {r['tender_id']} a rămas în starea '{STATUS_PROCESSING}': {reset_error}")
+            return
+        done = sum(1 for r in results if not r['error'])
+        _log(f"Rezultate încărcate în Creatio: {done} reușite, {len(results) - done} eșuate")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Worker Creatio: generează PTE și Rezumat pentru licitațiile noi.")
+    parser.add_argument('--base-url', default=creatio_base_url)
+    parser.add_argument('--once', action='store_true', help="o singură rundă, apoi ieșire")
+    parser.add_argument('--interval', type=float, default=60, help="secunde între interogări (implicit 60)")
+    parser.add_argument('--concurrency', type=int, default=2, help="licitații procesate simultan (implicit 2)")
+    parser.add_argument('--model', default=DEFAULT_MODEL)
+    args = parser.parse_args(argv)
+
+    client = CreatioClient(args.base_url, creatio_auth_secret, pool_size=max(4, args.concurrency * 2))
+    worker = CreatioWorker(client, model=args.model, concurrency=args.concurrency)
+    try:
+        if args.once:
+            worker.poll_once()
+        else:
+            worker.run_forever(interval=args.interval)
+    finally:
+        client.close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,336 @@
+"""
+Overnight bulk generation through the Message Batches API - half the price, results within hours.
+
+Usage:
+    python message_batches.py submit manifest.json [--model MODEL] [--proposal] [--base-url URL]
+    python message_batches.py status BATCH_ID [--base-url URL]
+    python message_batches.py collect BATCH_ID [--wait] [--interval 300] [--base-url URL]
+
+submit builds the requests of every tender in the manifest (same format as
+batch.py) exactly as the interactive pipeline sends them - one per PTE chunk
+and per Rezumat sub-section, each to the model route_model() picks for it -
+and sends them all as one Message Batch.
+Requests already answered in the response cache are not sent. The tender
+facts are extracted right away (one short call per tender, cached), since
+the Rezumat prompts contain them. The batch id and the tender list are saved
+in output/batches/<batch id>.json.
+
+collect (with --wait: once the batch has ended) downloads the results, stores
+them in the response cache, regenerates through the regular API only the
+requests that errored, expired or were cut off at max_tokens, and writes the
+documents with build_docx() (or one Propunere_tehnica.docx per tender with
+--proposal). A summary goes to output/batches/<batch id>_summary.json.
+
+Without the API, against the local stand-in:
+    python batches_standin.py --delay 5
+    python message_batches.py submit manifest.json --base-url http://127.0.0.1:5060
+"""
+import os
+import sys
+import json
+import time
+import argparse
+
+from app import (
+    BASE_DIR, SECTIONS, API_MAX_RETRIES, DocumentStore, TokenUsage,
+    anthropic_api_key, api_client, build_docx, extract_tender_facts, proposal_sections, pte_requests,
+    rezumat_from_parts, rezumat_prompts, route_model, runnable_sections,
+    _add_cost, _response_cache, _response_cache_key, _stream_claude,
+)
+from batch import load_manifest, _log
+from proposal import assemble_proposal
+
+
+BATCHES_DIR = os.path.join(BASE_DIR, 'output', 'batches')
+# Seconds between status checks while waiting for a batch
+BATCH_POLL_INTERVAL = 300
+# Sections a tender can get from a batch
+BATCH_SECTIONS = ('rezumat', 'pte')
+
+
+def _tender_log(name):
+    return lambda message: _log(name, message.strip())
+
+
+def _job_path(batch_id, suffix=''):
+    return os.path.join(BATCHES_DIR, f'{batch_id}{suffix}.json')
+
+
+def _tender_sections(tender, proposal):
+    """The sections to produce for a tender, in proposal order."""
+    runnable = runnable_sections(tender['inputs'])
+    wanted = runnable if proposal else tender['sections']
+    return [s.id for s in proposal_sections() if s.id in wanted and s.id in runnable and s.id in BATCH_SECTIONS]
+
+
+def _tender_requests(tender, sections, api_key, model, company_data, progress, usage=None):
+    """Requests of each section, as {section: [(key, number, model, system, user_prompt, max_tokens)]}.
+
+    key is the response cache key of the request, also used as the batch custom_id;
+    model is the routed model of the request (see route_model()).
+    """
+    documents = DocumentStore(tender['inputs'])
+    requests = {}
+    if 'pte' in sections:
+        requests['pte'] = [
+            (_response_cache_key(chunk_model, system, user_prompt, max_tokens), str(i + 1),
+             chunk_model, system, user_prompt, max_tokens)
+            for i, (chunk_model, system, user_prompt, max_tokens)
+            in enumerate(pte_requests(documents.pages('methodology'), model))
+        ]
+    if 'rezumat' in sections:
+        facts = extract_tender_facts(documents, api_key, progress_callback=progress)
+        system, parts = rezumat_prompts(
+            documents.pages('notice'), documents.pages('datasheet'), documents.pages('atr'),
+            company_data, progress_callback=progress, usage=usage, facts=facts,
+        )
+        requests['rezumat'] = []
+        for number, user_prompt, max_tokens in parts:
+            part_model = route_model(f'rezumat-{number}', model)[0]
+            requests['rezumat'].append((_response_cache_key(part_model, system, user_prompt, max_tokens), number,
+                                        part_model, system, user_prompt, max_tokens))
+    return requests
+
+
+def submit(manifest_path, model=None, api_key=None, proposal=False):
+    """Send the requests of every tender in the manifest as one batch.
+
+    Returns the saved job dict, or None when every response is already cached.
+    """
+    model, company_data, tenders = load_manifest(manifest_path, model)
+    api_key = api_key or anthropic_api_key
+    client = api_client(api_key)
+
+    batch_requests = {}
+    cached = 0
+    for tender in tenders:
+        tender['sections'] = _tender_sections(tender, proposal)
+        requests = _tender_requests(tender, tender['sections'], api_key, model, company_data,
+                                    _tender_log(tender['name']))
+        for section_requests in requests.values():
+            for key, _, request_model, system, user_prompt, max_tokens in section_requests:
+                if _response_cache.get(key) is not None:
+                    cached += 1
+                    continue
+                batch_requests[key] = {
+                    'custom_id': key,
+                    'params': {
+                        'model': request_model,
+                        'max_tokens': max_tokens,
+                        'system': system,
+                        'messages': [{'role': 'user', 'content': user_prompt}],
+                    },
+                }
+        _log(tender['name'], f"{sum(len(r) for r in requests.values())} cereri "
+                             f"({', '.join(tender['sections']) or 'nicio secțiune'})")
+
+    if not batch_requests:
+        return None
+
+    batch = client.with_options(max_retries=API_MAX_RETRIES).messages.batches.create(
+        requests=list(batch_requests.values()))
+    job = {
+        'batch_id': batch.id,
+        'submitted_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'manifest': os.path.abspath(manifest_path),
+        'model': model,
+        'proposal': proposal,
+        'company': company_data,
+        'tenders': tenders,
+        'requests': len(batch_requests),
+        'cached': cached,
+    }
+    os.makedirs(BATCHES_DIR, exist_ok=True)
+    with open(_job_path(batch.id), 'w', encoding='utf-8') as f:
+        json.dump(job, f, ensure_ascii=False, indent=2)
+    return job
+
+
+def status(batch_id, api_key=None):
+    """The batch as reported by the API (processing_status, request_counts, ...)."""
+    client = api_client(api_key or anthropic_api_key)
+    return client.with_options(max_retries=API_MAX_RETRIES).messages.batches.retrieve(batch_id)
+
+
+def _batch_results(client, batch_id, model, usage):
+    """{custom_id: (text, input_tokens, output_tokens)} of the complete results; the rest are left out.
+
+    model is the job's selected model, the baseline of what routed requests saved.
+    """
+    results = {}
+    incomplete = 0
+    for entry in client.messages.batches.results(batch_id):
+        result = entry.result
+        if result.type != 'succeeded' or result.message.stop_reason == 'max_tokens':
+            incomplete += 1
+            continue
+        message = result.message
+        text = ''.join(block.text for block in message.content if block.type == 'text')
+        results[entry.custom_id] = (text, message.usage.input_tokens, message.usage.output_tokens)
+        _response_cache.put(entry.custom_id, {
+            'text': text,
+            'input_tokens': message.usage.input_tokens,
+            'output_tokens': message.usage.output_tokens,
+        })
+        cache_read = getattr(message.usage, 'cache_read_input_tokens', None) or 0
+        cache_write = getattr(message.usage, 'cache_creation_input_tokens', None) or 0
+        usage.add(batch_requests=1, input_tokens=message.usage.input_tokens,
+                  output_tokens=message.usage.output_tokens,
+                  cache_read_tokens=cache_read, cache_write_tokens=cache_write)
+        _add_cost(usage, message.model, model, message.usage.input_tokens, message.usage.output_tokens,
+                  cache_read, cache_write, batch=True, baseline_warm=True)
+    return results, incomplete
+
+
+def _collect_tender(tender, job, results, client, api_key, usage):
+    """Write the documents of one tender; never raises, returns a summary record."""
+    name = tender['name']
+    record = {'tender': name, 'sections': tender['sections'], 'status': 'ok', 'outputs': []}
+    company_data = job['company']
+    model = job['model']
+
+    progress = _tender_log(name)
+    try:
+        requests = _tender_requests(tender, tender['sections'], api_key, model, company_data, progress, usage)
+        texts = {}
+        regenerated = 0
+        for section, section_requests in requests.items():
+            part_texts = {}
+            for key, number, request_model, system, user_prompt, max_tokens in section_requests:
+                if key in results:
+                    part_texts[number] = results[key][0]
+                    continue
+                # Errored, expired or truncated in the batch (or inputs changed since submit)
+                regenerated += 1
+                part_texts[number], _, _ = _stream_claude(
+                    client, request_model, system, user_prompt, progress_callback=progress,
+                    chunk_label=f"[{section} {number}] ", max_tokens=max_tokens, usage=usage,
+                    baseline_model=model, baseline_warm=True,
+                )
+            if section == 'pte':
+                texts[section] = '\n\n'.join(part_texts[str(i + 1)] for i in range(len(part_texts)))
+            else:
+                texts[section] = rezumat_from_parts(part_texts, company_data)
+        record['regenerated'] = regenerated
+
+        os.makedirs(tender['output_dir'], exist_ok=True)
+        if job['proposal']:
+            path = os.path.join(tender['output_dir'], 'Propunere_tehnica.docx')
+            assemble_proposal([(SECTIONS[section], texts[section]) for section in tender['sections']], path)
+            record['outputs'].append(path)
+        else:
+            for section, text in texts.items():
+                if section == 'pte':
+                    base_name = os.path.splitext(os.path.basename(tender['inputs']['methodology']))[0]
+                    path = os.path.join(tender['output_dir'], f'PTE_{base_name}.docx')
+                    build_docx(text, path, doc_type='pte')
+                else:
+                    path = os.path.join(tender['output_dir'], 'S01_Rezumat.docx')
+                    build_docx(text, path, doc_type='generic')
+                record['outputs'].append(path)
+        for path in record['outputs']:
+            progress(f"Document salvat: {path}")
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = f"{type(e).__name__}: {e}"
+        _log(name, f"EROARE: {e}")
+    return record
+
+
+def collect(batch_id, api_key=None, wait=False, interval=BATCH_POLL_INTERVAL):
+    """Write the documents of an ended batch; returns the summary dict, or None while it still runs."""
+    with open(_job_path(batch_id), 'r', encoding='utf-8') as f:
+        job = json.load(f)
+    api_key = api_key or anthropic_api_key
+    client = api_client(api_key)
+    batch_client = client.with_options(max_retries=API_MAX_RETRIES)
+
+    while True:
+        batch = batch_client.messages.batches.retrieve(batch_id)
+        counts = batch.request_counts
+        _log(batch_id, f"{batch.processing_status}: {counts.processing} în lucru, {counts.succeeded} reușite, "
+                       f"{counts.errored} erori, {counts.expired} expirate, {counts.canceled} anulate")
+        if batch.processing_status == 'ended':
+            break
+        if not wait:
+            return None
+        time.sleep(interval)
+
+    started = time.monotonic()
+    usage = TokenUsage()
+    results, incomplete = _batch_results(batch_client, batch_id, job['model'], usage)
+    if incomplete:
+        _log(batch_id, f"{incomplete} cereri fără rezultat complet - se regenerează prin API")
+
+    records = [_collect_tender(tender, job, results, client, api_key, usage) for tender in job['tenders']]
+    summary = {
+        'batch_id': batch_id,
+        'submitted_at': job['submitted_at'],
+        'collected_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'seconds': round(time.monotonic() - started, 2),
+        'model': job['model'],
+        'tenders': records,
+        'failed': sum(1 for r in records if r['status'] != 'ok'),
+        'usage': usage.as_dict(),
+    }
+    with open(_job_path(batch_id, '_summary'), 'w', encoding='utf-8') as f:
+        json.dump(summary, f, ensure_ascii=False, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generare în lot prin Message Batches API (cost redus, rezultat în câteva ore).")
+    parser.add_argument('--base-url', help="adresa API-ului (de ex. serverul local batches_standin.py)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    submit_parser = commands.add_parser('submit', help="trimite cererile tuturor licitațiilor din manifest")
+    submit_parser.add_argument('manifest', help="fișier JSON cu lista de licitații (formatul din batch.py)")
+    submit_parser.add_argument('--model', help="modelul Claude (implicit din manifest)")
+    submit_parser.add_argument('--proposal', action='store_true',
+                               help="un singur document Propunere_tehnica.docx pe licitație")
+
+    status_parser = commands.add_parser('status', help="starea unui lot trimis")
+    status_parser.add_argument('batch_id')
+
+    collect_parser = commands.add_parser('collect', help="preia rezultatele și scrie documentele")
+    collect_parser.add_argument('batch_id')
+    collect_parser.add_argument('--wait', action='store_true', help="așteaptă încheierea lotului")
+    collect_parser.add_argument('--interval', type=float, default=BATCH_POLL_INTERVAL,
+                                help=f"secunde între verificări cu --wait (implicit {BATCH_POLL_INTERVAL})")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        # Read by every Anthropic client created in this process
+        os.environ['ANTHROPIC_BASE_URL'] = args.base_url
+
+    if args.command == 'submit':
+        job = submit(args.manifest, model=args.model, proposal=args.proposal)
+        if job is None:
+            print("\nNu există cereri de trimis - toate răspunsurile sunt deja în cache; "
+                  "documentele se pot genera direct cu batch.py")
+            return 0
+        print(f"\nLot trimis: {job['batch_id']} ({job['requests']} cereri, {job['cached']} deja în cache)")
+        print(f"Rezultatele: python message_batches.py collect {job['batch_id']} --wait")
+        return 0
+
+    if args.command == 'status':
+        batch = status(args.batch_id)
+        counts = batch.request_counts
+        print(f"{batch.id}: {batch.processing_status} - {counts.processing} în lucru, {counts.succeeded} reușite, "
+              f"{counts.errored} erori, {counts.expired} expirate, {counts.canceled} anulate")
+        return 0
+
+    summary = collect(args.batch_id, wait=args.wait, interval=args.interval)
+    if summary is None:
+        print("Lotul nu s-a încheiat încă - reîncearcă mai târziu sau folosește --wait")
+        return 2
+    print(f"\n{len(summary['tenders'])} licitații, {summary['failed']} eșuate; "
+          f"{summary['usage']['batch_requests']} răspunsuri din lot, {summary['usage']['api_calls']} apeluri API directe")
+    print(f"Cost estimat: ${summary['usage']['cost_usd']:.4f}; {summary['usage']['routed_calls']} cereri "
+          f"rutate către modelul rapid, ~${summary['usage']['cost_saved_usd']:.4f} economisiți")
+    print(f"Sumar salvat: {_job_path(args.batch_id, '_summary')}")
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,123 @@
+"""
+Full proposal assembly - merges the generated sections into one DOCX.
+
+Sections come from the registry in app.py (register_section) and are run by
+its scheduler: independent sections in parallel, unchanged ones straight from
+the section cache. generate_proposal() then writes a single document with a
+table of contents and the sections in proposal order, each under its
+numbered heading.
+"""
+import os
+import re
+import time
+
+from docx.oxml import OxmlElement
+from docx.oxml.ns import qn
+
+from app import (
+    SECTIONS, DocumentStore, DocxRenderer, TokenUsage,
+    _new_document, _document_styles, _report_cost, run_sections, runnable_sections,
+)
+
+
+# ---------------------------------------------------------------------------
+# DOCUMENT ASSEMBLY
+# ---------------------------------------------------------------------------
+def _add_toc(doc):
+    """Insert a table of contents field; Word fills it in when the document is opened."""
+    paragraph = doc.add_paragraph()
+    run = paragraph.add_run()
+
+    begin = OxmlElement('w:fldChar')
+    begin.set(qn('w:fldCharType'), 'begin')
+    instr = OxmlElement('w:instrText')
+    instr.set(qn('xml:space'), 'preserve')
+    instr.text = 'TOC \\o "1-3" \\h \\z \\u'
+    separate = OxmlElement('w:fldChar')
+    separate.set(qn('w:fldCharType'), 'separate')
+    placeholder = OxmlElement('w:t')
+    placeholder.text = "Cuprinsul se actualizează la deschiderea documentului (sau cu F9)."
+    end = OxmlElement('w:fldChar')
+    end.set(qn('w:fldCharType'), 'end')
+    for element in (begin, instr, separate, placeholder, end):
+        run._r.append(element)
+
+    # Ask Word to refresh fields (the TOC) when the file is opened
+    update = OxmlElement('w:updateFields')
+    update.set(qn('w:val'), 'true')
+    doc.settings.element.append(update)
+
+
+def _strip_section_title(text, section):
+    """Drop the section's own title line (e.g. "## 1. Rezumat") - the assembler adds it.
+
+    Only a top-level heading ("#" or "##") with exactly the section's number
+    counts; a sub-heading such as "### 1.1 ..." is kept.
+    """
+    title = re.compile(rf'^#{{1,2}}\s+{re.escape(section.number)}\.?(?:\s|$)')
+    lines = text.split('\n')
+    for i, line in enumerate(lines):
+        if not line.strip():
+            continue
+        if title.match(line):
+            del lines[i]
+        break
+    return '\n'.join(lines)
+
+
+def assemble_proposal(section_texts, output_path, title="Propunere tehnică"):
+    """Write one DOCX from (Section, text) pairs, in the given order."""
+    doc = _new_document()
+    styles = _document_styles(doc)
+
+    doc.add_paragraph(title, style=doc.styles['Title'])
+    doc.add_paragraph("Cuprins", style=doc.styles['TOC Heading'])
+    _add_toc(doc)
+
+    for section, text in section_texts:
+        doc.add_page_break()
+        doc.add_paragraph(section.heading, style=styles[f'Heading {section.level}'])
+        # "## ..." is level 1 in the section text; shift it under the section's own heading
+        renderer = DocxRenderer(section.doc_type, doc=doc, heading_offset=section.level - 1)
+        renderer.feed(_strip_section_title(text, section))
+        renderer.finish()
+
+    output_dir = os.path.dirname(output_path)
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    doc.save(output_path)
+
+
+def generate_proposal(inputs, output_path, api_key, model, company_data, progress_callback=None,
+                      use_cache=True):
+    """Generate (or reuse from cache) every section whose inputs are given, then assemble them.
+
+    inputs maps input roles (methodology, notice, datasheet, atr) to PDF paths.
+    Returns a summary dict with the output path, where each section came from,
+    elapsed seconds and token usage.
+    """
+    started = time.monotonic()
+    usage = TokenUsage()
+    targets = runnable_sections(inputs)
+    if not targets:
+        raise FileNotFoundError("Nu există fișiere de intrare pentru nicio secțiune a propunerii")
+
+    # One store for the whole run: a PDF read by several sections is extracted once
+    documents = DocumentStore(inputs)
+    texts, sources = run_sections(targets, inputs, api_key, model, company_data,
+                                  progress_callback=progress_callback, use_cache=use_cache, usage=usage,
+                                  documents=documents)
+
+    if progress_callback:
+        progress_callback("Se asamblează propunerea tehnică...")
+    assemble_proposal([(SECTIONS[section_id], texts[section_id]) for section_id in targets], output_path)
+    if progress_callback:
+        progress_callback(f"  Document salvat: {output_path}")
+    _report_cost(usage, progress_callback)
+
+    return {
+        'output_path': output_path,
+        'sections': sources,
+        'seconds': round(time.monotonic() - started, 2),
+        'usage': usage.as_dict(),
+    }
@@ -0,0 +1,386 @@
+"""
+HTTP generation service - lets several users share one install.
+
+Usage:
+    python server.py [--host HOST] [--port PORT] [--concurrency 2] [--token SECRET]
+
+Host and port default to listeningHost and listeningPort from
+config/config.json. Every job is paid with the configured API key, so on any
+non-loopback interface a shared secret is required (--token or "serviceToken" in
+config.json), sent by clients as "Authorization: Bearer <secret>".
+Requires aiohttp (pip install aiohttp).
+
+Endpoints:
+    POST /jobs                  multipart upload; field "section" = pte | rezumat
+                                pte:     file "methodology"
+                                rezumat: files "notice", "datasheet", "atr"
+                                optional: "model", "use_cache" (0/1), "priority"
+                                (interactive | background) and the company
+                                fields (leader, associate, subcontractor,
+                                warranty_months, pm_experience)
+    GET  /jobs                  all jobs
+    GET  /jobs/{id}             job status
+    GET  /jobs/{id}/events      progress as Server-Sent Events (until the job ends)
+    GET  /jobs/{id}/result      the generated DOCX
+"""
+import os
+import sys
+import hmac
+import json
+import time
+import uuid
+import shutil
+import asyncio
+import argparse
+import ipaddress
+
+from aiohttp import web
+
+from app import (
+    BASE_DIR, DEFAULT_MODEL, MODELS, DEFAULT_COMPANY_DATA, API_PRIORITY_INTERACTIVE, API_PRIORITY_BACKGROUND,
+    anthropic_api_key, api_priority, run_pte, run_rezumat,
+)
+from config.config import listening_host, listening_port, service_token
+
+
+JOBS_INPUT_DIR = os.path.join(BASE_DIR, 'input', 'jobs')
+JOBS_OUTPUT_DIR = os.path.join(BASE_DIR, 'output', 'jobs')
+MAX_UPLOAD_BYTES = 200 * 1024 * 1024
+# Finished jobs are forgotten (with their files) after JOB_RETENTION seconds,
+# or sooner once more than MAX_FINISHED_JOBS have finished
+JOB_RETENTION = 24 * 3600
+MAX_FINISHED_JOBS = 200
+
+SECTION_FILES = {
+    'pte': ('methodology',),
+    'rezumat': ('notice', 'datasheet', 'atr'),
+}
+OUTPUT_NAMES = {
+    'pte': 'PTE.docx',
+    'rezumat': 'S01_Rezumat.docx',
+}
+# Admission priority of a job's API calls against the shared rate limits
+PRIORITIES = {
+    'interactive': API_PRIORITY_INTERACTIVE,
+    'background': API_PRIORITY_BACKGROUND,
+}
+
+
+class Job:
+    """One queued generation, with its progress log."""
+
+    def __init__(self, job_id, section, inputs, model, company_data, use_cache, priority='interactive'):
+        self.id = job_id
+        self.section = section
+        self.inputs = inputs
+        self.model = model
+        self.company_data = company_data
+        self.use_cache = use_cache
+        self.priority = priority
+        self.status = 'queued'
+        self.created = time.time()
+        self.finished_at = None
+        self.events = []
+        self.result = None
+        self.error = None
+        self._changed = asyncio.Event()
+
+    @property
+    def finished(self):
+        return self.status in ('done', 'error')
+
+    @property
+    def output_path(self):
+        return os.path.join(JOBS_OUTPUT_DIR, self.id, OUTPUT_NAMES[self.section])
+
+    def add_event(self, message):
+        self.events.append(message)
+        self._notify()
+
+    def set_status(self, status):
+        self.status = status
+        if self.finished:
+            self.finished_at = time.time()
+        self._notify()
+
+    def _notify(self):
+        changed, self._changed = self._changed, asyncio.Event()
+        changed.set()
+
+    async def wait_for_change(self, seen):
+        """Wait until there are more than `seen` events or the job has ended."""
+        while len(self.events) <= seen and not self.finished:
+            await self._changed.wait()
+
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'section': self.section,
+            'status': self.status,
+            'model': self.model,
+            'priority': self.priority,
+            'created': self.created,
+            'events': len(self.events),
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class GenerationService:
+    """Job queue drained by a fixed number of workers (bounded concurrency)."""
+
+    def __init__(self, concurrency=2, api_key=None):
+        self.concurrency = concurrency
+        self.api_key = api_key or anthropic_api_key
+        self.jobs = {}
+        self.queue = asyncio.Queue()
+        self._workers = []
+
+    async def start(self, app):
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+
+    async def stop(self, app):
+        for task in self._workers:
+            task.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+
+    def submit(self, job):
+        self._evict()
+        self.jobs[job.id] = job
+        self.queue.put_nowait(job)
+        job.add_event(f"În așteptare ({self.queue.qsize()} în coadă)")
+
+    def _evict(self):
+        """Drop finished jobs past JOB_RETENTION or beyond the newest MAX_FINISHED_JOBS, with their files."""
+        finished = sorted((job for job in self.jobs.values() if job.finished), key=lambda job: job.finished_at)
+        cutoff = time.time() - JOB_RETENTION
+        excess = len(finished) - MAX_FINISHED_JOBS
+        for i, job in enumerate(finished):
+            if i < excess or job.finished_at < cutoff:
+                del self.jobs[job.id]
+                shutil.rmtree(os.path.join(JOBS_INPUT_DIR, job.id), ignore_errors=True)
+                shutil.rmtree(os.path.join(JOBS_OUTPUT_DIR, job.id), ignore_errors=True)
+
+    async def _worker(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            job = await self.queue.get()
+            try:
+                job.set_status('running')
+
+                def progress(message, job=job):
+                    loop.call_soon_threadsafe(job.add_event, message)
+
+                job.result = await loop.run_in_executor(None, self._run, job, progress)
+                job.add_event("Gata! Documentul a fost generat cu succes.")
+                job.set_status('done')
+            except Exception as e:
+                job.error = f"{type(e).__name__}: {e}"
+                job.add_event(f"EROARE: {e}")
+                job.set_status('error')
+            finally:
+                self.queue.task_done()
+
+    def _run(self, job, progress):
+        """Blocking generation - runs in the default thread pool executor."""
+        with api_priority(PRIORITIES[job.priority]):
+            if job.section == 'pte':
+                return run_pte(
+                    job.inputs['methodology'], job.output_path,
+                    api_key=self.api_key, model=job.model,
+                    progress_callback=progress, use_cache=job.use_cache,
+                )
+            return run_rezumat(
+                job.inputs['notice'], job.inputs['datasheet'], job.inputs['atr'],
+                job.output_path, job.company_data,
+                api_key=self.api_key, model=job.model,
+                progress_callback=progress, use_cache=job.use_cache,
+            )
+
+
+# ---------------------------------------------------------------------------
+# HTTP HANDLERS
+# ---------------------------------------------------------------------------
+def _json_error(status, message):
+    return web.json_response({'error': message}, status=status)
+
+
+def _get_job(request):
+    job = request.app['service'].jobs.get(request.match_info['job_id'])
+    if job is None:
+        raise web.HTTPNotFound(text=json.dumps({'error': 'job inexistent'}),
+                               content_type='application/json')
+    return job
+
+
+@web.middleware
+async def require_token(request, handler):
+    """Reject requests without the shared secret (installed only when one is configured)."""
+    token = request.app['token']
+    supplied = request.headers.get('Authorization', '')
+    if not hmac.compare_digest(supplied.encode('utf-8'), f"Bearer {token}".encode('utf-8')):
+        return _json_error(401, "autentificare necesară (Authorization: Bearer <token>)")
+    return await handler(request)
+
+
+async def create_job(request):
+    job_id = uuid.uuid4().hex[:12]
+    input_dir = os.path.join(JOBS_INPUT_DIR, job_id)
+    try:
+        response = await _create_job(request, job_id, input_dir)
+    except BaseException:
+        shutil.rmtree(input_dir, ignore_errors=True)
+        raise
+    if response.status != 202:
+        # Rejected: the files uploaded so far are not needed
+        shutil.rmtree(input_dir, ignore_errors=True)
+    return response
+
+
+async def _create_job(request, job_id, input_dir):
+    fields = {}
+    files = {}
+
+    if not request.content_type.startswith('multipart/'):
+        return _json_error(400, "se așteaptă un formular multipart/form-data")
+
+    upload_names = {name for names in SECTION_FILES.values() for name in names}
+    reader = await request.multipart()
+    async for part in reader:
+        if part.filename:
+            if part.name not in upload_names:
+                return _json_error(400, f"fișier neașteptat: {part.name}")
+            os.makedirs(input_dir, exist_ok=True)
+            path = os.path.join(input_dir, f"{part.name}.pdf")
+            with open(path, 'wb') as f:
+                while True:
+                    block = await part.read_chunk()
+                    if not block:
+                        break
+                    f.write(block)
+            files[part.name] = path
+        else:
+            fields[part.name] = await part.text()
+
+    section = fields.get('section')
+    if section not in SECTION_FILES:
+        return _json_error(400, f"câmpul 'section' trebuie să fie unul din: {', '.join(SECTION_FILES)}")
+    missing = [name for name in SECTION_FILES[section] if name not in files]
+    if missing:
+        return _json_error(400, f"fișiere lipsă: {', '.join(missing)}")
+
+    model = fields.get('model') or DEFAULT_MODEL
+    if model not in MODELS:
+        return _json_error(400, f"model necunoscut: {model}")
+
+    priority = fields.get('priority') or 'interactive'
+    if priority not in PRIORITIES:
+        return _json_error(400, f"câmpul 'priority' trebuie să fie unul din: {', '.join(PRIORITIES)}")
+
+    company_data = dict(DEFAULT_COMPANY_DATA)
+    try:
+        for key, default in DEFAULT_COMPANY_DATA.items():
+            if key in fields:
+                company_data[key] = type(default)(fields[key])
+    except ValueError as e:
+        return _json_error(400, f"date companie invalide: {e}")
+
+    job = Job(job_id, section, files, model, company_data, use_cache=fields.get('use_cache', '1') != '0',
+              priority=priority)
+    request.app['service'].submit(job)
+    return web.json_response({
+        **job.to_dict(),
+        'status_url': f"/jobs/{job.id}",
+        'events_url': f"/jobs/{job.id}/events",
+        'result_url': f"/jobs/{job.id}/result",
+    }, status=202)
+
+
+async def list_jobs(request):
+    jobs = sorted(request.app['service'].jobs.values(), key=lambda j: j.created)
+    return web.json_response([job.to_dict() for job in jobs])
+
+
+async def job_status(request):
+    return web.json_response(_get_job(request).to_dict())
+
+
+async def job_events(request):
+    """Stream progress messages as SSE; replays earlier ones first."""
+    job = _get_job(request)
+    response = web.StreamResponse(headers={
+        'Content-Type': 'text/event-stream',
+        'Cache-Control': 'no-cache',
+    })
+    await response.prepare(request)
+
+    seen = 0
+    while True:
+        await job.wait_for_change(seen)
+        for message in job.events[seen:]:
+            await response.write(f"event: progress\ndata: {json.dumps(message, ensure_ascii=False)}\n\n".encode('utf-8'))
+        seen = len(job.events)
+        if job.finished and seen == len(job.events):
+            break
+
+    await response.write(f"event: end\ndata: {json.dumps(job.to_dict(), ensure_ascii=False)}\n\n".encode('utf-8'))
+    await response.write_eof()
+    return response
+
+
+async def job_result(request):
+    job = _get_job(request)
+    if job.status != 'done':
+        return _json_error(409, f"job-ul nu este gata (status: {job.status})")
+    return web.FileResponse(job.output_path, headers={
+        'Content-Disposition': f'attachment; filename="{OUTPUT_NAMES[job.section]}"',
+    })
+
+
+def create_app(concurrency=2, api_key=None, token=None):
+    """The service; with token, every request must carry "Authorization: Bearer <token>"."""
+    service = GenerationService(concurrency=concurrency, api_key=api_key)
+    app = web.Application(client_max_size=MAX_UPLOAD_BYTES, middlewares=[require_token] if token else [])
+    app['service'] = service
+    app['token'] = token
+    app.on_startup.append(service.start)
+    app.on_cleanup.append(service.stop)
+    app.add_routes([
+        web.post('/jobs', create_job),
+        web.get('/jobs', list_jobs),
+        web.get('/jobs/{job_id}', job_status),
+        web.get('/jobs/{job_id}/events', job_events),
+        web.get('/jobs/{job_id}/result', job_result),
+    ])
+    return app
+
+
+def _is_loopback(host):
+    if host == 'localhost':
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviciu HTTP pentru generarea PTE și Rezumat.")
+    parser.add_argument('--host', default=listening_host,
+                        help="interfața de ascultare (implicit listeningHost din config.json; "
+                             "în afara loopback este necesar --token)")
+    parser.add_argument('--port', type=int, default=int(listening_port))
+    parser.add_argument('--concurrency', type=int, default=2, help="generări rulate simultan (implicit 2)")
+    parser.add_argument('--token', default=service_token,
+                        help="secretul cerut clienților în antetul Authorization (implicit serviceToken din config)")
+    args = parser.parse_args(argv)
+
+    if not args.token and not _is_loopback(args.host):
+        parser.error(f"ascultarea pe {args.host} cere un secret partajat (--token sau serviceToken în config.json)")
+
+    web.run_app(create_app(concurrency=args.concurrency, token=args.token), host=args.host, port=args.port)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
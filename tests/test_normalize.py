@@ -0,0 +1,54 @@
+"""Regression tests for iter_normalized_pages (header/footer removal must not touch the text)."""
+from app import iter_normalized_pages
+
+
+def _sample_pages():
+    pages = []
+    for n in range(1, 7):
+        body = [
+            f"Procedura {n} montaj",
+            "Scop:",
+            f"Montarea echipamentelor din zona {n} se face dintr-",
+            "un singur punct de acces, pe latura nord-",
+            "vest a amplasamentului, conform proiectului.",
+            "| Panou | buc | 12 |",
+            "Responsabilități:",
+            f"Șeful de punct de lucru verifică faza {n} înainte de recepție.",
+        ]
+        pages.append('\n'.join(["SC Exemplu SRL - Metodologie de execuție"] + body
+                               + [f"Pagina {n} din 6", str(n)]))
+    return pages
+
+
+def test_hyphenated_forms_are_not_joined():
+    text = '\n'.join(iter_normalized_pages(_sample_pages()))
+    assert "dintrun" not in text and "nordvest" not in text
+    assert "dintr-\nun" in text and "nord-\nvest" in text
+
+
+def test_soft_hyphen_breaks_are_joined():
+    pages = [f"Titlu {n}\nechipa\xad\nmentele sunt montate\nrând de test" for n in range(3)]
+    assert all("echipamentele" in page for page in iter_normalized_pages(pages))
+
+
+def test_edge_headings_and_labels_are_kept():
+    pages = list(iter_normalized_pages(_sample_pages()))
+    for n, page in enumerate(pages, start=1):
+        assert page.startswith(f"Procedura {n} montaj")
+        assert "Scop:" in page and "Responsabilități:" in page
+
+
+def test_repeated_body_lines_are_kept_on_every_page():
+    pages = list(iter_normalized_pages(_sample_pages()))
+    assert all(page.strip() for page in pages)
+    assert all(page.count("| Panou | buc | 12 |") == 1 for page in pages)
+
+
+def test_running_headers_footers_and_page_numbers_are_dropped():
+    stats = {}
+    pages = list(iter_normalized_pages(_sample_pages(), stats=stats))
+    for page in pages:
+        assert "SC Exemplu SRL" not in page
+        assert "Pagina" not in page
+        assert not page.splitlines()[-1].strip().isdigit()
+    assert stats['lines_removed'] == 3 * len(pages)